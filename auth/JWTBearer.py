@@ -1,23 +1,19 @@
 import base64
+import hashlib
 import json
-from typing import Dict, Optional, List
+from typing import Optional, Union
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwk
 from jose.utils import base64url_decode
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from starlette.status import HTTP_403_FORBIDDEN
-from auth.user_auth import user_info_with_token
-
-# Define the type for JWK
-JWK = Dict[str, str]
-
-
-# Model for the JSON Web Key Set (JWKS)
-class JWKS(BaseModel):
-    keys: List[JWK]
+from auth.async_user_auth import user_info_with_token
+from auth.jwks import JWK, JWKS, JWKSProvider
+from cache.ttl_cache import TTLCache
+from metrics.prometheus import phase_timer
 
 
 # Model for JWT authorization credentials
@@ -31,10 +27,58 @@ class JWTAuthorizationCredentials(BaseModel):
 
 # Class to handle JWT authentication
 class JWTBearer(HTTPBearer):
-    def __init__(self, jwks: JWKS, auto_error: bool = True):
+    def __init__(
+        self,
+        jwks: Union[JWKS, JWKSProvider],
+        auto_error: bool = True,
+        token_cache: Optional[TTLCache] = None,
+    ):
         super().__init__(auto_error=auto_error)
-        # Map KIDs to their corresponding JWKs
-        self.kid_to_jwk = {jwk["kid"]: jwk for jwk in jwks.keys}
+        # Source of the public keys, a fixed JWKS is served as is
+        if isinstance(jwks, JWKS):
+            jwks = JWKSProvider(jwks=jwks)
+        self.jwks = jwks
+        # Recently verified tokens, keyed by token hash
+        self.token_cache = token_cache
+
+    @staticmethod
+    def token_cache_key(jwt_token: str) -> str:
+        """
+        Get the cache key of a JWT token.
+
+        :param jwt_token: JWT token.
+        :return: SHA-256 hex digest of the token.
+        """
+        return hashlib.sha256(jwt_token.encode()).hexdigest()
+
+    def cache_credentials(self, jwt_credentials: JWTAuthorizationCredentials):
+        """
+        Store verified credentials in the token cache, capped by the token's expiration.
+
+        :param jwt_credentials: Verified JWTAuthorizationCredentials object.
+        """
+        if self.token_cache is None:
+            return
+
+        try:
+            expires_at = float(jwt_credentials.claims["exp"])
+        except (KeyError, ValueError):
+            expires_at = None
+
+        self.token_cache.set(
+            self.token_cache_key(jwt_credentials.jwt_token),
+            jwt_credentials,
+            expires_at=expires_at,
+        )
+
+    def invalidate_token(self, jwt_token: str):
+        """
+        Remove a token from the token cache, e.g. after logout.
+
+        :param jwt_token: JWT token to remove.
+        """
+        if self.token_cache is not None:
+            self.token_cache.delete(self.token_cache_key(jwt_token))
 
     def decode_jwt(self, token: str):
         """
@@ -56,6 +100,17 @@ class JWTBearer(HTTPBearer):
         except Exception:
             return None, None  # Return None on error
 
+    def get_public_key(self, kid: str):
+        """
+        Get the public key of a KID, constructing it only once.
+
+        :param kid: Key ID from the JWT header.
+        :return: Constructed public key.
+
+        :raises KeyError: If the KID is not in the JWKS.
+        """
+        return self.jwks.get_key(kid)
+
     def verify_jwk_token(self, jwt_credentials: JWTAuthorizationCredentials) -> bool:
         """
         Verify a JWT token using a JWK.
@@ -64,21 +119,19 @@ class JWTBearer(HTTPBearer):
         :return: True if the token is valid, otherwise False.
         """
         try:
-            public_key = self.kid_to_jwk[jwt_credentials.header["kid"]]
+            key = self.get_public_key(jwt_credentials.header["kid"])
         except KeyError:
             raise HTTPException(
                 status_code=HTTP_403_FORBIDDEN, detail="JWK public key not found"
             )
 
-        # Construct the public key
-        key = jwk.construct(public_key)
         # Decode the signature
         decoded_signature = base64url_decode(jwt_credentials.signature.encode())
 
         # Verify the token's signature
         return key.verify(jwt_credentials.message.encode(), decoded_signature)
 
-    def verify_token_revoed(self, jwt_token: str):
+    async def verify_token_revoed(self, jwt_token: str):
         """
         Verify if the token is revoked.
 
@@ -87,7 +140,7 @@ class JWTBearer(HTTPBearer):
         :raises HTTPException: If the token is revoked.
         """
         try:
-            user_info_with_token(jwt_token)
+            await user_info_with_token(jwt_token)
         except ClientError as e:
             # Verifica se a exceção é 'NotAuthorizedException', ou seja, o token foi revogado
             if e.response["Error"]["Code"] == "NotAuthorizedException":
@@ -97,6 +150,8 @@ class JWTBearer(HTTPBearer):
                 )
             else:
                 raise  # Levanta outras exceções de boto3
+        except HTTPException:
+            raise
         except Exception as e:
             # Qualquer outra exceção que precise ser tratada
             raise HTTPException(
@@ -108,6 +163,25 @@ class JWTBearer(HTTPBearer):
         """
         Call method to authenticate the request.
 
+        The credentials are stored in the request state, so every dependency
+        of the same request reuses a single verification.
+
+        :param request: Incoming request.
+        :return: JWTAuthorizationCredentials object if valid, otherwise raise an HTTPException.
+
+        :raises HTTPException: If the JWT is invalid.
+        """
+        jwt_credentials = getattr(request.state, "jwt_credentials", None)
+        if jwt_credentials is None:
+            with phase_timer("jwt"):
+                jwt_credentials = await self.authenticate(request)
+            request.state.jwt_credentials = jwt_credentials
+        return jwt_credentials
+
+    async def authenticate(self, request: Request) -> Optional[JWTAuthorizationCredentials]:
+        """
+        Authenticate the request.
+
         :param request: Incoming request.
         :return: JWTAuthorizationCredentials object if valid, otherwise raise an HTTPException.
 
@@ -123,8 +197,14 @@ class JWTBearer(HTTPBearer):
 
         jwt_token = credentials.credentials
 
+        # Skip the verification of recently verified tokens
+        if self.token_cache is not None:
+            cached_credentials = self.token_cache.get(self.token_cache_key(jwt_token))
+            if cached_credentials is not None:
+                return cached_credentials
+
         # Validate if token is revoked
-        self.verify_token_revoed(jwt_token)
+        await self.verify_token_revoed(jwt_token)
 
         self.validate_jwt_structure(jwt_token)
 
@@ -138,10 +218,17 @@ class JWTBearer(HTTPBearer):
                 status_code=HTTP_403_FORBIDDEN, detail="Invalid JWT header"
             )
 
+        # Fetching the keys of an unknown KID must not block the event loop
+        kid = jwt_credentials.header.get("kid")
+        if self.jwks.needs_fetch(kid):
+            await run_in_threadpool(self.jwks.ensure_key, kid)
+
         # Verify if the token is valid
         if not self.verify_jwk_token(jwt_credentials):
             raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="JWK invalid")
 
+        self.cache_credentials(jwt_credentials)
+
         return jwt_credentials  # Return the JWT credentials if valid
 
     def verify_authentication_scheme(self, credentials: HTTPAuthorizationCredentials):
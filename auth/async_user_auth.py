@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from fastapi import HTTPException
+from starlette.status import HTTP_504_GATEWAY_TIMEOUT
+
+from auth import user_auth
+
+# Bounded pool for the blocking boto3/requests calls, so they never run on the event loop
+executor = ThreadPoolExecutor(
+    max_workers=user_auth.COGNITO_MAX_WORKERS, thread_name_prefix="cognito"
+)
+
+
+async def run_in_executor(func, *args, timeout: float = user_auth.COGNITO_TIMEOUT):
+    """
+    Run a blocking Cognito call in the executor.
+
+    :param func: Blocking function to call.
+    :param args: Arguments of the function.
+    :param timeout: Maximum time to wait for the call, in seconds.
+    :return: Result of the function.
+
+    :raises HTTPException: If the call does not finish in time.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(executor, partial(func, *args)), timeout
+        )
+    except asyncio.TimeoutError:
+        logging.error(f"Cognito call {func.__name__} timed out after {timeout}s")
+        raise HTTPException(
+            status_code=HTTP_504_GATEWAY_TIMEOUT,
+            detail="Authentication provider timed out",
+        )
+
+
+async def auth_with_code(code: str, redirect_uri: str):
+    """
+    Async version of auth.user_auth.auth_with_code.
+
+    :param code: Authorization code obtained after user login.
+    :param redirect_uri: Redirect URI used during the login process.
+    :return: Access token and expiration time if authentication is successful, otherwise None.
+    """
+    return await run_in_executor(user_auth.auth_with_code, code, redirect_uri)
+
+
+async def user_info_with_token(access_token: str):
+    """
+    Async version of auth.user_auth.user_info_with_token.
+
+    :param access_token: Access token obtained after successful authentication.
+    :return: User information if successful, otherwise None.
+    """
+    return await run_in_executor(user_auth.user_info_with_token, access_token)
+
+
+async def logout_with_token(access_token: str):
+    """
+    Async version of auth.user_auth.logout_with_token.
+
+    :param access_token: Access token to revoke.
+    :return: True if successful, otherwise False.
+    """
+    return await run_in_executor(user_auth.logout_with_token, access_token)
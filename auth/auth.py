@@ -1,29 +1,45 @@
 import os
-import requests
+import logging
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
-from starlette.status import HTTP_403_FORBIDDEN
-from auth.JWTBearer import JWKS, JWTBearer, JWTAuthorizationCredentials
+from sqlalchemy.orm import Session
+from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+from auth.JWTBearer import JWTBearer, JWTAuthorizationCredentials
+from auth.jwks import JWKSProvider
+from cache.ttl_cache import TTLCache
+from crud.async_user import get_cached_user_by_username
+from crud.user import invalidate_user_cache
+from db.async_database import get_session
+from db.routing import set_session_user
+from schemas.user import UserInDB
 
 load_dotenv()
 
 AWS_REGION = os.environ.get("AWS_REGION")
 USER_POOL_ID = os.environ.get("USER_POOL_ID")
-
-# Get the JWKS from the Cognito User Pool
-response = requests.get(
-    f"https://cognito-idp.{AWS_REGION}.amazonaws.com/{USER_POOL_ID}/.well-known/jwks.json"
+JWKS_URL = os.environ.get(
+    "COGNITO_JWKS_URL",
+    f"https://cognito-idp.{AWS_REGION}.amazonaws.com/{USER_POOL_ID}/.well-known/jwks.json",
 )
+JWKS_REFRESH_INTERVAL = float(os.environ.get("JWKS_REFRESH_INTERVAL", 3600))
+JWKS_MIN_REFETCH_INTERVAL = float(os.environ.get("JWKS_MIN_REFETCH_INTERVAL", 30))
+JWKS_CACHE_FILE = os.environ.get("JWKS_CACHE_FILE")
+# Verified tokens are trusted for TOKEN_CACHE_TTL seconds before Cognito is asked again
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", 60))
 
-print(response.json())
-
-# Check if 'keys' field is present in the response
-if 'keys' not in response.json():
-    raise ValueError("The 'keys' field is missing in the JWKS response")
+# The JWKS of the Cognito User Pool, fetched on first use and refreshed in the background
+jwks_provider = JWKSProvider(
+    JWKS_URL,
+    refresh_interval=JWKS_REFRESH_INTERVAL,
+    min_refetch_interval=JWKS_MIN_REFETCH_INTERVAL,
+    cache_file=JWKS_CACHE_FILE,
+)
 
-jwks = JWKS.model_validate(response.json())
+token_cache = TTLCache(max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
 
-auth = JWTBearer(jwks)
+# Shared by every router
+auth = JWTBearer(jwks_provider, token_cache=token_cache)
 
 
 async def get_current_user(
@@ -39,4 +55,31 @@ async def get_current_user(
     try:
         return credentials.claims["username"]
     except KeyError:
-        HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Username missing")
\ No newline at end of file
+        raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Username missing")
+
+
+async def get_current_user_record(
+    credentials: JWTAuthorizationCredentials = Depends(auth),
+    db: Session = Depends(get_session),
+) -> UserInDB:
+    """
+    Get the current user record, served from the user cache when possible.
+
+    :param credentials: JWTAuthorizationCredentials object.
+    :param db: Database session.
+    :return: User of the JWT token.
+    """
+    username = await get_current_user(credentials)
+    set_session_user(db, credentials.claims.get("sub"))
+
+    user = await get_cached_user_by_username(username, db)
+    # The user id is the token's sub claim, a mismatch means the cached user was recreated
+    if user is not None and user.id != credentials.claims.get("sub"):
+        invalidate_user_cache(username)
+        user = await get_cached_user_by_username(username, db)
+
+    if user is None:
+        logging.error(f"User with username {username} not found.")
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="User not found.")
+
+    return user
@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+from jose import jwk
+from pydantic import BaseModel, ValidationError
+
+# Define the type for JWK
+JWK = Dict[str, str]
+
+
+# Model for the JSON Web Key Set (JWKS)
+class JWKS(BaseModel):
+    keys: List[JWK]
+
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class JWKSProvider:
+    """
+    Source of the public keys used to verify JWT signatures.
+
+    Keys are loaded on first use, from the cache file when there is one,
+    otherwise from the JWKS URL. A background thread refreshes them on an
+    interval using conditional requests (ETag) and honouring Cache-Control
+    max-age. A token signed with an unknown KID triggers a refetch, limited
+    to one every ``min_refetch_interval`` seconds and shared by concurrent
+    callers. Without a URL the provider serves a fixed key set.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        jwks: Optional[JWKS] = None,
+        refresh_interval: float = 3600,
+        min_refetch_interval: float = 30,
+        cache_file: Optional[str] = None,
+        timeout: float = 5,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self.cache_file = cache_file
+        self.timeout = timeout
+
+        self.kid_to_jwk: Dict[str, JWK] = {}
+        # Constructed public keys, built on first use of each KID
+        self.kid_to_key = {}
+        self.etag: Optional[str] = None
+        self.expires_at = 0.0
+        self.last_fetch = 0.0
+        self.last_fetch_done = 0.0
+        self.loaded = False
+
+        self._fetch_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if jwks is not None:
+            self.set_keys(jwks, expires_at=float("inf"))
+
+    def set_keys(self, jwks: JWKS, etag: Optional[str] = None, expires_at: float = 0.0):
+        """
+        Replace the key set, keeping constructed keys whose JWK did not change.
+
+        :param jwks: New JWKS.
+        :param etag: ETag of the JWKS response.
+        :param expires_at: Timestamp after which the keys should be refreshed.
+        """
+        kid_to_jwk = {key["kid"]: key for key in jwks.keys}
+        self.kid_to_key = {
+            kid: key
+            for kid, key in self.kid_to_key.items()
+            if self.kid_to_jwk.get(kid) == kid_to_jwk.get(kid)
+        }
+        self.kid_to_jwk = kid_to_jwk
+        self.etag = etag
+        self.expires_at = expires_at
+        self.loaded = True
+
+    def needs_fetch(self, kid: Optional[str]) -> bool:
+        """
+        Check if getting the key of a KID requires a network fetch.
+
+        :param kid: Key ID from the JWT header.
+        :return: True if the keys are not loaded or the KID is unknown.
+        """
+        return self.url is not None and (not self.loaded or kid not in self.kid_to_jwk)
+
+    def ensure_key(self, kid: Optional[str]):
+        """
+        Load the keys if needed and refetch them when the KID is unknown.
+
+        :param kid: Key ID from the JWT header.
+        """
+        if not self.loaded:
+            self.load()
+        if self.needs_fetch(kid):
+            self.refresh()
+
+    def get_key(self, kid: str):
+        """
+        Get the public key of a KID, constructing it only once.
+
+        Never fetches, so it can run on the event loop: load the keys with
+        ensure_key, in a thread, first.
+
+        :param kid: Key ID from the JWT header.
+        :return: Constructed public key.
+
+        :raises KeyError: If the KID is not in the loaded keys.
+        """
+        key = self.kid_to_key.get(kid)
+        if key is None:
+            key = jwk.construct(self.kid_to_jwk[kid])
+            self.kid_to_key[kid] = key
+        return key
+
+    def load(self):
+        """
+        Load the keys from the cache file, or from the network if there is none.
+        """
+        if not self.load_cache_file():
+            self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Fetch the JWKS. Concurrent callers share a single request.
+
+        :param force: Ignore the minimum interval between fetches.
+        :return: True if the keys are up to date, otherwise False.
+        """
+        requested_at = time.monotonic()
+        with self._fetch_lock:
+            # Another caller fetched while this one was waiting
+            if self.last_fetch_done >= requested_at:
+                return self.loaded
+            if not force and requested_at - self.last_fetch < self.min_refetch_interval:
+                return False
+            self.last_fetch = time.monotonic()
+            try:
+                return self._fetch()
+            finally:
+                self.last_fetch_done = time.monotonic()
+
+    def _fetch(self) -> bool:
+        """
+        Request the JWKS, conditionally when the keys have an ETag.
+
+        :return: True if the keys are up to date, otherwise False.
+        """
+        headers = {"If-None-Match": self.etag} if self.etag and self.loaded else {}
+        try:
+            response = requests.get(self.url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.error(f"Error fetching JWKS: {e}")
+            return False
+
+        expires_at = time.time() + self.get_max_age(response)
+        if response.status_code == 304:
+            self.expires_at = expires_at
+            self.save_cache_file()
+            return True
+        if response.status_code != 200:
+            logging.error(f"Error fetching JWKS: {response.status_code}")
+            return False
+
+        try:
+            body = response.json()
+            # Check if 'keys' field is present in the response
+            if not isinstance(body, dict) or "keys" not in body:
+                logging.error("The 'keys' field is missing in the JWKS response")
+                return False
+            jwks = JWKS.model_validate(body)
+        except (ValueError, ValidationError) as e:
+            logging.error(f"Invalid JWKS response: {e}")
+            return False
+        # The keys are looked up by KID, see set_keys
+        if any("kid" not in key for key in jwks.keys):
+            logging.error("A key is missing the 'kid' field in the JWKS response")
+            return False
+
+        self.set_keys(
+            jwks,
+            etag=response.headers.get("ETag"),
+            expires_at=expires_at,
+        )
+        self.save_cache_file()
+        return True
+
+    def get_max_age(self, response: requests.Response) -> float:
+        """
+        Get how long a JWKS response stays fresh.
+
+        :param response: JWKS response.
+        :return: Cache-Control max-age bounded by the refetch and refresh intervals.
+        """
+        match = MAX_AGE_PATTERN.search(response.headers.get("Cache-Control", ""))
+        if match is None:
+            return self.refresh_interval
+        return min(max(float(match.group(1)), self.min_refetch_interval), self.refresh_interval)
+
+    def load_cache_file(self) -> bool:
+        """
+        Load the keys saved by a previous process.
+
+        :return: True if the keys were loaded, otherwise False.
+        """
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+
+        try:
+            with open(self.cache_file) as f:
+                data = json.load(f)
+            self.set_keys(
+                JWKS.model_validate(data),
+                etag=data.get("etag"),
+                expires_at=data.get("expires_at", 0.0),
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Error loading JWKS cache file: {e}")
+            return False
+        return True
+
+    def save_cache_file(self):
+        """
+        Save the keys so the next process can skip the network.
+        """
+        if not self.cache_file:
+            return
+
+        data = {
+            "keys": list(self.kid_to_jwk.values()),
+            "etag": self.etag,
+            "expires_at": self.expires_at,
+        }
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logging.error(f"Error saving JWKS cache file: {e}")
+
+    def start(self):
+        """
+        Start refreshing the keys in a background thread.
+        """
+        if self.url is None or self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._refresh_loop, name="jwks-refresh", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background refresh thread.
+        """
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _refresh_loop(self):
+        try:
+            if not self.loaded:
+                self.load()
+        except Exception:
+            logging.exception("Error loading JWKS")
+        while True:
+            delay = max(self.expires_at - time.time(), self.min_refetch_interval)
+            if self._stop_event.wait(delay):
+                return
+            # An error must not stop the refreshes
+            try:
+                self.refresh(force=True)
+            except Exception:
+                logging.exception("Error refreshing JWKS")
@@ -1,17 +1,50 @@
 import os
+import threading
 
-import boto3
 import requests
 import base64
 from dotenv import load_dotenv
 
+from metrics.prometheus import phase_timer
+
 load_dotenv()
 
-cognito_client = boto3.client(
-    "cognito-idp", region_name=os.getenv("AWS_REGION", "us-east-1")
-)
+# Upper bound, in seconds, for every call to Cognito
+COGNITO_TIMEOUT = float(os.getenv("COGNITO_TIMEOUT", 5))
+COGNITO_MAX_WORKERS = int(os.getenv("COGNITO_MAX_WORKERS", 16))
+
+_cognito_client = None
+_cognito_client_lock = threading.Lock()
 
 
+def get_cognito_client():
+    """
+    Get the Cognito client, creating it on first use so importing the API
+    does not load boto3 or its service models.
+
+    :return: boto3 cognito-idp client.
+    """
+    global _cognito_client
+    if _cognito_client is None:
+        with _cognito_client_lock:
+            if _cognito_client is None:
+                import boto3
+                from botocore.config import Config
+
+                _cognito_client = boto3.client(
+                    "cognito-idp",
+                    region_name=os.getenv("AWS_REGION", "us-east-1"),
+                    endpoint_url=os.getenv("COGNITO_ENDPOINT_URL"),
+                    config=Config(
+                        connect_timeout=COGNITO_TIMEOUT,
+                        read_timeout=COGNITO_TIMEOUT,
+                        max_pool_connections=COGNITO_MAX_WORKERS,
+                    ),
+                )
+    return _cognito_client
+
+
+@phase_timer("cognito")
 def auth_with_code(code: str, redirect_uri: str):
     """
     Authenticate using the authorization code -> returns tokens from Amazon Cognito User Pool.
@@ -41,6 +74,7 @@ def auth_with_code(code: str, redirect_uri: str):
             "Content-Type": "application/x-www-form-urlencoded",
             "Authorization": f"Basic {auth_header}",
         },
+        timeout=COGNITO_TIMEOUT,
     )
 
     # Check if request was successful
@@ -55,6 +89,7 @@ def auth_with_code(code: str, redirect_uri: str):
         return None
 
 
+@phase_timer("cognito")
 def user_info_with_token(access_token: str):
     """
     Get user information using the access token.
@@ -63,7 +98,7 @@ def user_info_with_token(access_token: str):
     :return: User information if successful, otherwise None.
     """
 
-    response = cognito_client.get_user(AccessToken=access_token)
+    response = get_cognito_client().get_user(AccessToken=access_token)
 
     if response.get("ResponseMetadata").get("HTTPStatusCode") == 200:
         return response
@@ -72,6 +107,7 @@ def user_info_with_token(access_token: str):
         return None
 
 
+@phase_timer("cognito")
 def logout_with_token(access_token: str):
     """
     Logout the user by revoking the access token.
@@ -80,7 +116,7 @@ def logout_with_token(access_token: str):
     :return: True if successful, otherwise False.
     """
 
-    response = cognito_client.global_sign_out(AccessToken=access_token)
+    response = get_cognito_client().global_sign_out(AccessToken=access_token)
 
     if response.get("ResponseMetadata").get("HTTPStatusCode") == 200:
         return True
@@ -0,0 +1,60 @@
+"""
+Concurrent Cognito calls against a slow local stub.
+
+Compares calling the blocking auth.user_auth functions from coroutines (as the
+routes used to) with the executor-backed auth.async_user_auth layer.
+
+Usage: python -m benchmarks.bench_async_cognito [concurrency] [delay]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+from benchmarks.cognito_stub import start_cognito_stub
+
+CONCURRENCY = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+DELAY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+server = start_cognito_stub(delay=DELAY)
+os.environ["COGNITO_ENDPOINT_URL"] = f"http://127.0.0.1:{server.server_port}"
+os.environ["COGNITO_TOKEN_ENDPOINT"] = f"http://127.0.0.1:{server.server_port}/oauth2/token"
+os.environ.setdefault("AWS_REGION", "us-east-1")
+
+from auth import async_user_auth, user_auth  # noqa: E402
+
+
+async def blocking_call():
+    # What an async route did before: a synchronous call on the event loop
+    return user_auth.user_info_with_token("access_token")
+
+
+async def async_call():
+    return await async_user_auth.user_info_with_token("access_token")
+
+
+async def run(call) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(CONCURRENCY)))
+    return time.perf_counter() - start
+
+
+def main():
+    # Warm up the connection pools of both paths
+    asyncio.run(run(blocking_call))
+    asyncio.run(run(async_call))
+
+    results = {
+        "concurrency": CONCURRENCY,
+        "upstream_delay_s": DELAY,
+        "blocking_s": round(asyncio.run(run(blocking_call)), 3),
+        "async_s": round(asyncio.run(run(async_call)), 3),
+    }
+    results["speedup"] = round(results["blocking_s"] / results["async_s"], 1)
+    print(json.dumps(results))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Requests per second of the task list in sync and async database mode.
+
+Runs the real app in-process against a local SQLite database and adds a
+simulated latency to every query, executed by the database driver: with
+the sync engine it blocks the event loop, with the async engine (aiosqlite)
+it runs in the driver's thread while other requests proceed. Authentication
+is replaced by a fixed user and the task list cache is disabled, so only the
+database path is measured.
+
+Usage: python -m benchmarks.bench_async_db [requests] [concurrency] [latency_ms]
+"""
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from auth.auth import auth, get_current_user_record
+from cache.ttl_cache import TTLCache
+from crud.task import task_list_cache
+from db.async_database import get_session
+from main import app
+from models.task import Task
+from models.user import User
+from schemas.user import UserInDB
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+LATENCY_MS = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+user = UserInDB(id="bench_user", given_name="Bench", family_name="User", username="bench", email="bench@email.com")
+
+
+def add_latency(engine):
+    """
+    Make every statement of the engine wait LATENCY_MS inside the driver.
+    """
+
+    @event.listens_for(engine, "connect")
+    def register_sleep(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def sleep(conn, cursor, statement, parameters, context, executemany):
+        cursor.execute("SELECT sleep_ms(?)", (LATENCY_MS,))
+
+
+def seed(url):
+    engine = create_engine(url)
+    Task.metadata.create_all(engine)
+    User.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as db:
+        db.add(User(**user.model_dump()))
+        db.execute(
+            insert(Task),
+            [
+                {
+                    "id": f"task{i:06d}",
+                    "user_id": user.id,
+                    "title": f"Task {i}",
+                    "description": "Benchmark task",
+                    "created_at": now + timedelta(seconds=i),
+                    "priority": i % 5,
+                    "deadline": now + timedelta(days=1),
+                    "status": "Todo",
+                }
+                for i in range(100)
+            ],
+        )
+        db.commit()
+    engine.dispose()
+
+
+async def run_load() -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def request():
+            async with semaphore:
+                response = await client.get("/api/tasks?limit=20")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(REQUESTS)))
+        return time.perf_counter() - start
+
+
+def main():
+    path = f"{tempfile.mkdtemp()}/bench.db"
+    seed(f"sqlite:///{path}")
+
+    sync_engine = create_engine(f"sqlite:///{path}", pool_size=CONCURRENCY, max_overflow=0)
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool, pool_size=CONCURRENCY, max_overflow=0
+    )
+    add_latency(sync_engine)
+    add_latency(async_engine.sync_engine)
+
+    def sync_session():
+        with Session(sync_engine) as db:
+            yield db
+
+    async def async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as db:
+            yield db
+
+    app.dependency_overrides[auth] = lambda: None
+    app.dependency_overrides[get_current_user_record] = lambda: user
+    backend = task_list_cache.backend
+    task_list_cache.backend = TTLCache(max_size=0)
+
+    async def run_modes():
+        results = {}
+        for mode, session in (("sync", sync_session), ("async", async_session)):
+            app.dependency_overrides[get_session] = session
+            elapsed = await run_load()
+            results[mode] = {"elapsed_s": round(elapsed, 3), "rps": round(REQUESTS / elapsed, 1)}
+        await async_engine.dispose()
+        return results
+
+    results = asyncio.run(run_modes())
+    app.dependency_overrides = {}
+    task_list_cache.backend = backend
+    sync_engine.dispose()
+    print(
+        json.dumps(
+            {
+                "requests": REQUESTS,
+                "concurrency": CONCURRENCY,
+                "latency_ms": LATENCY_MS,
+                **results,
+                "speedup": round(results["sync"]["elapsed_s"] / results["async"]["elapsed_s"], 1),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Importing tasks one request at a time vs one bulk request.
+
+Runs the real app in-process against a local SQLite database (or MYSQL_URL
+when set). Authentication is replaced by a fixed user so only the import
+path is measured.
+
+Usage: python -m benchmarks.bench_bulk_import [tasks]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from auth.auth import auth, get_current_user_record
+from db.database import get_db
+from main import app
+from models.task import Task
+from models.user import User
+from schemas.user import UserInDB
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+user = UserInDB(id="bench_user", given_name="Bench", family_name="User", username="bench", email="bench@email.com")
+
+
+def main():
+    url = os.environ.get("MYSQL_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    Task.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with session_factory() as db:
+        db.add(User(**user.model_dump()))
+        db.commit()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[auth] = lambda: None
+    app.dependency_overrides[get_current_user_record] = lambda: user
+    client = TestClient(app)
+
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    tasks = [
+        {"title": f"Task {i}", "description": "Imported task", "priority": i % 5, "deadline": deadline}
+        for i in range(TASKS)
+    ]
+
+    start = time.perf_counter()
+    for task in tasks:
+        assert client.post("/api/tasks", json=task).status_code == 201
+    single_s = time.perf_counter() - start
+
+    with session_factory() as db:
+        db.execute(delete(Task))
+        db.commit()
+
+    start = time.perf_counter()
+    response = client.post("/api/tasks/bulk", json=tasks)
+    bulk_s = time.perf_counter() - start
+    assert response.status_code == 200
+
+    app.dependency_overrides = {}
+    print(
+        json.dumps(
+            {
+                "tasks": TASKS,
+                "single_s": round(single_s, 3),
+                "single_tasks_per_s": round(TASKS / single_s),
+                "bulk_s": round(bulk_s, 3),
+                "bulk_tasks_per_s": round(TASKS / bulk_s),
+                "speedup": round(single_s / bulk_s, 1),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Throughput of JWTBearer.verify_jwk_token with and without memoized public keys.
+
+Usage: python -m benchmarks.bench_jwk_verify [iterations]
+"""
+import json
+import sys
+import time
+
+from jose import jwk
+
+from auth.JWTBearer import JWKS, JWTBearer
+from benchmarks.tokens import LocalSigner
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+
+class UncachedJWTBearer(JWTBearer):
+    # Previous behaviour: the key is constructed on every verification
+    def get_public_key(self, kid: str):
+        return jwk.construct(self.jwks.kid_to_jwk[kid])
+
+
+def measure(bearer: JWTBearer, credentials) -> float:
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        assert bearer.verify_jwk_token(credentials[i % len(credentials)])
+    return ITERATIONS / (time.perf_counter() - start)
+
+
+def main():
+    signers = [LocalSigner(f"kid{i}") for i in range(2)]
+    jwks = JWKS(keys=[signer.jwk for signer in signers])
+    cached, uncached = JWTBearer(jwks), UncachedJWTBearer(jwks)
+
+    credentials = []
+    for signer in signers:
+        token = signer.token()
+        header, claims = cached.decode_jwt(token)
+        credentials.append(cached.create_jwt_credentials(token, header, claims))
+
+    results = {
+        "iterations": ITERATIONS,
+        "uncached_per_s": round(measure(uncached, credentials)),
+        "cached_per_s": round(measure(cached, credentials)),
+    }
+    results["speedup"] = round(results["cached_per_s"] / results["uncached_per_s"], 2)
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Offset vs keyset pagination of one user's task list.
+
+Seeds a local SQLite database (or MYSQL_URL when set) with many tasks for a
+single user and times fetching pages at increasing depths.
+
+Usage: python -m benchmarks.bench_pagination [tasks] [page_size]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from crud.task import encode_cursor, get_tasks_page
+from models.task import Task
+from models.user import User
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+PAGE_SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+REPEAT = 5
+
+
+def seed(session_factory):
+    now = datetime.now(timezone.utc)
+    with session_factory() as db:
+        db.add(User(id="bench_user", given_name="Bench", family_name="User", username="bench", email="bench@email.com"))
+        db.commit()
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": "bench_user",
+                "title": f"Task {i}",
+                "description": "Benchmark task",
+                "created_at": now + timedelta(seconds=i),
+                "priority": i % 5,
+                "deadline": now + timedelta(days=1),
+                "status": "Todo",
+            }
+            for i in range(TASKS)
+        ]
+        for start in range(0, TASKS, 10_000):
+            db.execute(insert(Task), rows[start:start + 10_000])
+        db.commit()
+
+
+def offset_page(db, offset):
+    return (
+        db.query(Task)
+        .filter(Task.user_id == "bench_user")
+        .order_by(Task.created_at, Task.id)
+        .offset(offset)
+        .limit(PAGE_SIZE)
+        .all()
+    )
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    url = os.environ.get("MYSQL_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    Task.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    seed(session_factory)
+
+    results = []
+    with session_factory() as db:
+        for depth in (0, TASKS // 2, TASKS - PAGE_SIZE):
+            previous = offset_page(db, depth - 1)[0] if depth else None
+            cursor = encode_cursor(previous) if previous is not None else None
+            results.append(
+                {
+                    "depth": depth,
+                    "offset_ms": round(measure(lambda: offset_page(db, depth)), 2),
+                    "keyset_ms": round(
+                        measure(lambda: get_tasks_page("bench_user", db, limit=PAGE_SIZE, cursor=cursor)), 2
+                    ),
+                }
+            )
+    print(json.dumps({"tasks": TASKS, "page_size": PAGE_SIZE, "pages": results}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Connection pool behaviour at saturation.
+
+Runs more concurrent workers than the pool can serve against a local SQLite
+database (or MYSQL_URL when set). Each worker checks out a connection, runs a
+query and holds the connection for a while. Reports checkout latency,
+timeouts, and the peak in-use and overflow counts of the pool.
+
+Usage: python -m benchmarks.bench_pool_saturation [workers] [pool_size] [max_overflow] [pool_timeout]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from db.database import engine_options
+from db.pool_metrics import InstrumentedQueuePool
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+POOL_SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+MAX_OVERFLOW = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+POOL_TIMEOUT = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+HOLD = 0.1
+REQUESTS_PER_WORKER = 5
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    url = os.environ.get("MYSQL_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    options = engine_options(url)
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    engine = create_engine(url, **options)
+    metrics = engine.pool.metrics
+
+    waits = []
+    peak = {"in_use": 0, "overflow": 0}
+    lock = threading.Lock()
+
+    def record(wait, metrics):
+        snapshot = metrics.snapshot()
+        with lock:
+            waits.append(wait)
+            peak["in_use"] = max(peak["in_use"], snapshot["in_use"])
+            peak["overflow"] = max(peak["overflow"], snapshot["overflow"])
+
+    metrics.add_hook(record)
+
+    def worker():
+        timeouts = 0
+        for _ in range(REQUESTS_PER_WORKER):
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                    time.sleep(HOLD)
+            except PoolTimeoutError:
+                timeouts += 1
+        return timeouts
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        timeouts = sum(executor.map(lambda _: worker(), range(WORKERS)))
+    elapsed = time.perf_counter() - start
+
+    snapshot = metrics.snapshot()
+    print(
+        json.dumps(
+            {
+                "workers": WORKERS,
+                "pool_size": POOL_SIZE,
+                "max_overflow": MAX_OVERFLOW,
+                "pool_timeout": POOL_TIMEOUT,
+                "requests": WORKERS * REQUESTS_PER_WORKER,
+                "checkouts": snapshot["checkouts"],
+                "timeouts": timeouts,
+                "elapsed_s": round(elapsed, 2),
+                "checkout_p50_ms": round(percentile(waits, 0.5) * 1000, 2),
+                "checkout_p99_ms": round(percentile(waits, 0.99) * 1000, 2),
+                "checkout_max_ms": round(snapshot["checkout_time_max"] * 1000, 2),
+                "peak_in_use": peak["in_use"],
+                "peak_overflow": peak["overflow"],
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Serialization cost of task list responses, per 1k tasks.
+
+Compares the response_model path (ORM objects validated into TaskInDB, then
+jsonable_encoder and json.dumps) with the fast path (result rows picked into
+dicts and encoded with orjson, or json when orjson is not installed). Both
+are measured on loaded objects and including the query, on a local SQLite
+database (or MYSQL_URL when set).
+
+Usage: python -m benchmarks.bench_serialization [tasks]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from crud.task import TASK_RESPONSE_COLUMNS
+from models.task import Task
+from models.user import User
+from schemas import encoding
+from schemas.encoding import dumps, rows_to_dicts
+from schemas.task import TaskInDB
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+REPEAT = 20
+
+adapter = TypeAdapter(List[TaskInDB])
+fields = tuple(TaskInDB.model_fields)
+
+
+def response_model_path(tasks) -> bytes:
+    validated = adapter.validate_python(tasks, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(rows) -> bytes:
+    return dumps(rows_to_dicts(rows, fields))
+
+
+def per_1k_ms(func) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return round((time.perf_counter() - start) / REPEAT * 1000 * 1000 / TASKS, 3)
+
+
+def main():
+    url = os.environ.get("MYSQL_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    Task.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as db:
+        db.add(User(id="bench_user", given_name="Bench", family_name="User", username="bench", email="bench@email.com"))
+        db.execute(
+            insert(Task),
+            [
+                {
+                    "id": f"task{i:06d}",
+                    "user_id": "bench_user",
+                    "title": f"Task {i}",
+                    "description": "Benchmark task",
+                    "created_at": now + timedelta(seconds=i),
+                    "priority": i % 5,
+                    "deadline": now + timedelta(days=1),
+                    "status": "Todo",
+                }
+                for i in range(TASKS)
+            ],
+        )
+        db.commit()
+
+    def load_objects():
+        with Session(engine) as db:
+            return db.scalars(select(Task).where(Task.user_id == "bench_user")).all()
+
+    def load_rows():
+        with Session(engine) as db:
+            return db.execute(select(*TASK_RESPONSE_COLUMNS).where(Task.user_id == "bench_user")).all()
+
+    objects = load_objects()
+    rows = load_rows()
+    assert json.loads(response_model_path(objects)) == json.loads(fast_path(rows))
+
+    print(
+        json.dumps(
+            {
+                "tasks": TASKS,
+                "encoder": "orjson" if encoding.orjson is not None else "json",
+                "serialize_per_1k_ms": {
+                    "response_model": per_1k_ms(lambda: response_model_path(objects)),
+                    "fast": per_1k_ms(lambda: fast_path(rows)),
+                },
+                "query_and_serialize_per_1k_ms": {
+                    "response_model": per_1k_ms(lambda: response_model_path(load_objects())),
+                    "fast": per_1k_ms(lambda: fast_path(load_rows())),
+                },
+            }
+        )
+    )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
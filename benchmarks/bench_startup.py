@@ -0,0 +1,90 @@
+"""
+Startup time of the API: importing main, then serving the first request.
+
+Each run is a fresh interpreter with network connections blocked, against a
+local SQLite database. It reports the import time, the time to run the
+lifespan and serve GET /health, and the network connections attempted while
+importing, which should be none.
+
+Usage: python -m benchmarks.bench_startup [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, socket, time
+
+connects = []
+
+def blocked_connect(self, address):
+    connects.append(str(address))
+    raise OSError("Network access is blocked")
+
+socket.socket.connect = blocked_connect
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+import_connects = len(connects)
+
+from fastapi.testclient import TestClient
+
+with TestClient(main.app) as client:
+    status = client.get("/health").status_code
+served = time.perf_counter()
+
+print(json.dumps({
+    "import_s": imported - start,
+    "first_request_s": served - imported,
+    "import_connects": import_connects,
+    "status": status,
+}))
+"""
+
+
+def run_once(database_url: str) -> dict:
+    env = {
+        **os.environ,
+        "MYSQL_URL": database_url,
+        "COGNITO_JWKS_URL": "http://127.0.0.1:9/.well-known/jwks.json",
+        "AWS_REGION": "us-east-1",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summary_ms(values) -> dict:
+    return {
+        "min": round(min(values) * 1000, 1),
+        "median": round(statistics.median(values) * 1000, 1),
+    }
+
+
+def main():
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/startup.db"
+    runs = [run_once(database_url) for _ in range(RUNS)]
+    assert all(run["status"] == 200 for run in runs)
+
+    print(
+        json.dumps(
+            {
+                "runs": RUNS,
+                "import_ms": summary_ms([run["import_s"] for run in runs]),
+                "first_request_ms": summary_ms([run["first_request_s"] for run in runs]),
+                "import_network_connects": max(run["import_connects"] for run in runs),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
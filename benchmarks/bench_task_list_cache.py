@@ -0,0 +1,115 @@
+"""
+Latency of the task list with and without the response cache.
+
+Runs the real app in-process against a local SQLite database (or MYSQL_URL
+when set) and polls GET /api/tasks for one user, first with the cache
+disabled, then enabled. Authentication is replaced by a fixed user so only
+the list path is measured.
+
+Usage: python -m benchmarks.bench_task_list_cache [tasks] [requests]
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from auth.auth import auth, get_current_user_record
+from cache.ttl_cache import TTLCache
+from crud.task import task_list_cache
+from db.database import get_db
+from main import app
+from models.task import Task
+from models.user import User
+from schemas.user import UserInDB
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+user = UserInDB(id="bench_user", given_name="Bench", family_name="User", username="bench", email="bench@email.com")
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def measure(client):
+    samples = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        assert client.get("/api/tasks").status_code == 200
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    url = os.environ.get("MYSQL_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    Task.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    now = datetime.now(timezone.utc)
+    with session_factory() as db:
+        db.add(User(**user.model_dump()))
+        db.execute(
+            insert(Task),
+            [
+                {
+                    "id": f"task{i:06d}",
+                    "user_id": user.id,
+                    "title": f"Task {i}",
+                    "description": "Benchmark task",
+                    "created_at": now + timedelta(seconds=i),
+                    "priority": i % 5,
+                    "deadline": now + timedelta(days=1),
+                    "status": "Todo",
+                }
+                for i in range(TASKS)
+            ],
+        )
+        db.commit()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[auth] = lambda: None
+    app.dependency_overrides[get_current_user_record] = lambda: user
+    client = TestClient(app)
+
+    backend = task_list_cache.backend
+    task_list_cache.backend = TTLCache(max_size=0)
+    uncached = measure(client)
+    task_list_cache.backend = backend
+    task_list_cache.clear()
+    cached = measure(client)
+
+    app.dependency_overrides = {}
+    print(
+        json.dumps(
+            {
+                "tasks": TASKS,
+                "requests": REQUESTS,
+                "uncached": uncached,
+                "cached": cached,
+                "cache": task_list_cache.stats(),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Memory and time of loading a task list page as ORM objects or as TaskRow tuples.
+
+Loads the tasks of one user with get_tasks_page in both modes, on a local
+SQLite database (or MYSQL_URL when set), and reports the memory allocated
+per row, measured with tracemalloc, and the loading time per 1k rows.
+
+Usage: python -m benchmarks.bench_task_rows [tasks]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from crud.task import get_tasks_page
+from models.task import Task
+from models.user import User
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+REPEAT = 5
+
+
+def main():
+    url = os.environ.get("MYSQL_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    Task.metadata.create_all(engine)
+    now = datetime.now(timezone.utc)
+    with Session(engine) as db:
+        db.add(User(id="bench_user", given_name="Bench", family_name="User", username="bench", email="bench@email.com"))
+        db.execute(
+            insert(Task),
+            [
+                {
+                    "id": f"task{i:06d}",
+                    "user_id": "bench_user",
+                    "title": f"Task {i}",
+                    "description": "Benchmark task",
+                    "created_at": now + timedelta(seconds=i),
+                    "priority": i % 5,
+                    "deadline": now + timedelta(days=1),
+                    "status": "Todo",
+                }
+                for i in range(TASKS)
+            ],
+        )
+        db.commit()
+
+    def load(as_rows: bool):
+        with Session(engine) as db:
+            tasks, _ = get_tasks_page("bench_user", db, limit=TASKS, as_rows=as_rows)
+            return len(tasks)
+
+    def bytes_per_row(as_rows: bool) -> int:
+        with Session(engine) as db:
+            tracemalloc.start()
+            tasks, _ = get_tasks_page("bench_user", db, limit=TASKS, as_rows=as_rows)
+            allocated, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert len(tasks) == TASKS
+            return allocated // TASKS
+
+    def per_1k_ms(as_rows: bool) -> float:
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            load(as_rows)
+        return round((time.perf_counter() - start) / REPEAT * 1000 * 1000 / TASKS, 3)
+
+    print(
+        json.dumps(
+            {
+                "tasks": TASKS,
+                "bytes_per_row": {"orm": bytes_per_row(False), "rows": bytes_per_row(True)},
+                "load_per_1k_ms": {"orm": per_1k_ms(False), "rows": per_1k_ms(True)},
+            }
+        )
+    )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs
+
+from jose import jwt
+
+from benchmarks.tokens import LocalSigner
+
+
+class CognitoStubHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for the Cognito endpoints used by the API.
+
+    Serves the OAuth2 token endpoint and the GetUser/GlobalSignOut actions of
+    the cognito-idp JSON protocol, each answered after ``server.delay`` seconds.
+
+    With a ``server.signer``, the JWKS is served too, the token endpoint
+    returns a token signed for the user named by the code, and GetUser
+    answers for the user of the token.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body: dict, status: int = 200, content_type: str = "application/json"):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/.well-known/jwks.json" and self.server.signer is not None:
+            self.send_json(self.server.signer.jwks())
+        else:
+            self.send_json({"message": "Not found"}, status=404)
+
+    def token_user(self, access_token: str):
+        # Username and sub of a token signed by the stub, the default user otherwise
+        if self.server.signer is None:
+            return "username1", "id1"
+        try:
+            claims = jwt.get_unverified_claims(access_token)
+        except Exception:
+            return "username1", "id1"
+        return claims["username"], claims["sub"]
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.delay)
+
+        if self.path.startswith("/oauth2/token"):
+            access_token = "stub_access_token"
+            if self.server.signer is not None:
+                code = parse_qs(body.decode()).get("code", ["username1"])[0]
+                access_token = self.server.signer.token(sub=f"id_{code}", username=code)
+            self.send_json({"access_token": access_token, "expires_in": 3600})
+            return
+
+        action = self.headers.get("X-Amz-Target", "").rsplit(".", 1)[-1]
+        if action == "GetUser":
+            username, sub = self.token_user(json.loads(body or b"{}").get("AccessToken", ""))
+            self.send_json(
+                {
+                    "Username": username,
+                    "UserAttributes": [
+                        {"Name": "email", "Value": f"{username}@email.com"},
+                        {"Name": "email_verified", "Value": "true"},
+                        {"Name": "family_name", "Value": "family_name1"},
+                        {"Name": "given_name", "Value": "given_name1"},
+                        {"Name": "sub", "Value": sub},
+                    ],
+                },
+                content_type="application/x-amz-json-1.1",
+            )
+        elif action == "GlobalSignOut":
+            self.send_json({}, content_type="application/x-amz-json-1.1")
+        else:
+            self.send_json({"__type": "InvalidAction"}, status=400)
+
+
+def start_cognito_stub(delay: float = 0.0, port: int = 0, signer: Optional[LocalSigner] = None) -> ThreadingHTTPServer:
+    """
+    Start the Cognito stub in a background thread.
+
+    :param delay: Seconds to wait before answering each request.
+    :param port: Port to listen on, 0 picks a free one.
+    :param signer: Key pair to serve the JWKS of and sign tokens with.
+    :return: Running server, stop it with shutdown().
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), CognitoStubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.signer = signer
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
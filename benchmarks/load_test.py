@@ -0,0 +1,250 @@
+"""
+Load test of the API, served by uvicorn as in production.
+
+Starts main:app in a uvicorn subprocess against a local SQLite database (or
+MYSQL_URL when set), with the Cognito stub serving the JWKS, the token
+endpoint, GetUser and GlobalSignOut. Users log in through the API, then
+workers send a mix of list, create, update, delete and login requests for a
+fixed time at each concurrency level. The request mix is drawn from a seeded
+generator, so runs with the same arguments send the same requests.
+
+Prints one JSON object with the throughput and latency percentiles of every
+level, overall and per operation, to compare runs across commits.
+
+Usage: python -m benchmarks.load_test [--concurrency 1,8,32] [--duration 10] [--users 8]
+       [--mix list=60,create=15,update=10,delete=5,login=10] [--workers 1] [--cognito-delay 0]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.cognito_stub import start_cognito_stub
+from benchmarks.tokens import LocalSigner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = "list=60,create=15,update=10,delete=5,login=10"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(samples: List[Tuple[float, bool]], duration: float) -> dict:
+    latencies = [latency * 1000 for latency, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "rps": round(len(samples) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for item in mix.split(","):
+        operation, _, weight = item.partition("=")
+        weights[operation.strip()] = int(weight)
+    unknown = set(weights) - {"list", "create", "update", "delete", "login"}
+    if unknown:
+        raise ValueError(f"Unknown operations in the mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(port: int, stub_url: str, database_url: str, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MYSQL_URL": database_url,
+        "AWS_REGION": "us-east-1",
+        "AWS_ACCESS_KEY_ID": "local",
+        "AWS_SECRET_ACCESS_KEY": "local",
+        "COGNITO_JWKS_URL": f"{stub_url}/.well-known/jwks.json",
+        "COGNITO_ENDPOINT_URL": stub_url,
+        "COGNITO_TOKEN_ENDPOINT": f"{stub_url}/oauth2/token",
+        "COGNITO_USER_CLIENT_ID": "local",
+        "COGNITO_USER_CLIENT_SECRET": "local",
+        "REDIRECT_URI": "http://localhost/callback",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_for_api(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The API exited during startup.")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("The API did not start in time.")
+
+
+async def login(client: httpx.AsyncClient, username: str) -> str:
+    response = await client.post("/api/auth/sign-in", params={"code": username})
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+class Worker:
+    """
+    Client sending requests of the mix as one user, one at a time.
+
+    Updates and deletes go to the tasks the worker created; without any, a
+    task is created instead.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, username: str, token: str, rng: random.Random, mix: Dict[str, int]):
+        self.client = client
+        self.username = username
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rng = rng
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.task_ids: List[str] = []
+
+    def task_body(self) -> dict:
+        return {
+            "title": f"Task {self.rng.randrange(1_000_000)}",
+            "description": "Load test task",
+            "priority": self.rng.randrange(1, 5),
+            "deadline": "2099-01-01T00:00:00Z",
+        }
+
+    async def request(self, operation: str) -> Tuple[str, httpx.Response]:
+        if operation in ("update", "delete") and not self.task_ids:
+            operation = "create"
+
+        if operation == "list":
+            return operation, await self.client.get("/api/tasks", params={"limit": 50}, headers=self.headers)
+        if operation == "create":
+            response = await self.client.post("/api/tasks", json=self.task_body(), headers=self.headers)
+            if response.status_code == 201:
+                self.task_ids.append(response.json()["id"])
+            return operation, response
+        if operation == "update":
+            task_id = self.rng.choice(self.task_ids)
+            return operation, await self.client.put(f"/api/tasks/{task_id}", json={"priority": self.rng.randrange(1, 5)}, headers=self.headers)
+        if operation == "delete":
+            task_id = self.task_ids.pop(self.rng.randrange(len(self.task_ids)))
+            return operation, await self.client.delete(f"/api/tasks/{task_id}", headers=self.headers)
+        return operation, await self.client.post("/api/auth/sign-in", params={"code": self.username})
+
+    async def run(self, until: float, samples: Dict[str, List[Tuple[float, bool]]]):
+        while time.monotonic() < until:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                operation, response = await self.request(operation)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples[operation].append((time.perf_counter() - start, ok))
+
+
+async def run_level(
+    client: httpx.AsyncClient, tokens: Dict[str, str], concurrency: int, duration: float, mix: Dict[str, int], seed: int
+) -> dict:
+    usernames = list(tokens)
+    workers = [
+        Worker(client, usernames[i % len(usernames)], tokens[usernames[i % len(usernames)]], random.Random(seed + i), mix)
+        for i in range(concurrency)
+    ]
+    samples: Dict[str, List[Tuple[float, bool]]] = defaultdict(list)
+    start = time.monotonic()
+    await asyncio.gather(*(worker.run(start + duration, samples) for worker in workers))
+    elapsed = time.monotonic() - start
+
+    return {
+        "concurrency": concurrency,
+        **summarize([sample for operation in samples.values() for sample in operation], elapsed),
+        "operations": {operation: summarize(samples[operation], elapsed) for operation in sorted(samples)},
+    }
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    database_url = os.environ.get("MYSQL_URL") or f"sqlite:///{tempfile.mkdtemp()}/load_test.db"
+
+    stub = start_cognito_stub(delay=args.cognito_delay, signer=LocalSigner())
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+    port = free_port()
+    process = start_api(port, stub_url, database_url, args.workers)
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+            await wait_for_api(client, process)
+            usernames = [f"load_user{i}" for i in range(args.users)]
+            tokens = dict(zip(usernames, await asyncio.gather(*(login(client, username) for username in usernames))))
+
+            # Warm up the caches and connection pools of the API
+            await run_level(client, tokens, min(levels), min(args.duration, 2), mix, args.seed)
+            results = [
+                await run_level(client, tokens, concurrency, args.duration, mix, args.seed) for concurrency in levels
+            ]
+    finally:
+        process.terminate()
+        process.wait()
+        stub.shutdown()
+
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {
+        "commit": commit or None,
+        "database": database_url.split(":", 1)[0],
+        "workers": args.workers,
+        "users": args.users,
+        "duration_s": args.duration,
+        "cognito_delay_s": args.cognito_delay,
+        "mix": mix,
+        "seed": args.seed,
+        "levels": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the API.")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma separated concurrency levels.")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per concurrency level.")
+    parser.add_argument("--users", type=int, default=8, help="Number of users logged in.")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weights of the operations.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of uvicorn worker processes.")
+    parser.add_argument("--cognito-delay", type=float, default=0.0, help="Seconds the Cognito stub waits per call.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the request mix.")
+    print(json.dumps(asyncio.run(run(parser.parse_args()))))
+
+
+if __name__ == "__main__":
+    main()
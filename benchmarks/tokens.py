@@ -0,0 +1,36 @@
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+
+class LocalSigner:
+    """
+    RSA key pair that signs Cognito-like access tokens for local runs.
+    """
+
+    def __init__(self, kid: str = "local_kid"):
+        self.kid = kid
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        self.jwk = {**jwk.construct(public_pem, "RS256").to_dict(), "kid": kid}
+
+    def jwks(self) -> dict:
+        return {"keys": [self.jwk]}
+
+    def token(self, sub: str = "id1", username: str = "username1", expires_in: int = 3600) -> str:
+        claims = {
+            "sub": sub,
+            "username": username,
+            "token_use": "access",
+            "exp": int(time.time()) + expires_in,
+        }
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": self.kid})
@@ -0,0 +1,161 @@
+import json
+import threading
+import uuid
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from cache.ttl_cache import TTLCache
+
+# Serialized body and headers of a response
+CachedResponse = Tuple[bytes, Dict[str, str]]
+
+
+class RedisCacheBackend:
+    """
+    Cache backend shared between processes, stored in Redis.
+
+    Has the get/set/delete/clear interface of TTLCache for bytes values.
+    """
+
+    def __init__(self, url: str, ttl: float = 60.0, prefix: str = "response_cache:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for the redis cache backend.") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.client.get(self.prefix + str(key))
+        return default if value is None else value
+
+    def set(self, key: Hashable, value: bytes, ttl: Optional[float] = None):
+        self.client.set(self.prefix + str(key), value, px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    def delete(self, key: Hashable) -> bool:
+        return bool(self.client.delete(self.prefix + str(key)))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Cache of serialized responses, grouped by owner.
+
+    Every owner has a generation that is part of the keys of its entries.
+    Invalidating an owner replaces its generation, which drops all of its
+    entries, whatever the query parameters, with one write to the backend.
+
+    The backend is any object with the get/set/delete/clear methods of
+    TTLCache, storing bytes: TTLCache in-process, RedisCacheBackend shared.
+    """
+
+    def __init__(self, backend, namespace: str = "response"):
+        self.backend = backend
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def generation(self, owner: str) -> str:
+        """
+        Get the current generation of an owner.
+
+        :param owner: Owner of the entries, e.g. a user ID.
+        :return: Generation of the owner.
+        """
+        key = f"{self.namespace}:generation:{owner}"
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation)
+        return generation.decode() if isinstance(generation, bytes) else generation
+
+    def lookup(self, owner: str, params: str) -> Tuple[str, Optional[CachedResponse]]:
+        """
+        Look up a response.
+
+        :param owner: Owner of the response.
+        :param params: Normalized query parameters of the request.
+        :return: Key to store the response under, and the cached response or None.
+        """
+        key = f"{self.namespace}:{owner}:{self.generation(owner)}:{params}"
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None:
+            return key, None
+
+        headers, body = value.split(b"\n", 1)
+        return key, (body, json.loads(headers))
+
+    def store(self, key: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+        """
+        Store a response under the key returned by lookup.
+
+        A response built while its owner was invalidated is stored under the
+        previous generation, so it is never served.
+
+        :param key: Key returned by lookup.
+        :param body: Serialized body.
+        :param headers: Headers of the response.
+        """
+        self.backend.set(key, json.dumps(headers or {}).encode() + b"\n" + body)
+
+    def invalidate(self, owner: str):
+        """
+        Drop all responses of an owner.
+
+        :param owner: Owner of the responses.
+        """
+        self.backend.set(f"{self.namespace}:generation:{owner}", uuid.uuid4().hex)
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        """
+        Remove every entry and reset the counters.
+        """
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> dict:
+        """
+        Get the cache counters.
+
+        :return: Dictionary with hits, misses, hit ratio and invalidations.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def create_backend(backend: str, max_size: int, ttl: float, redis_url: Optional[str] = None):
+    """
+    Create a cache backend by name.
+
+    :param backend: "memory" for an in-process LRU, "redis" for a shared cache.
+    :param max_size: Maximum number of entries of the memory backend.
+    :param ttl: Time to live of the entries, in seconds.
+    :param redis_url: URL of the Redis server of the redis backend.
+    :return: Cache backend.
+    """
+    if backend == "redis":
+        return RedisCacheBackend(redis_url, ttl=ttl)
+    if backend == "memory":
+        return TTLCache(max_size=max_size, ttl=ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,156 @@
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from datetime import datetime
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from crud import task as task_crud
+from db.async_database import run_db
+from models.task import Task
+from schemas.task import TaskBulkResult, TaskBulkUpdate, TaskCreate, TaskUpdate
+
+# Async versions of crud.task. With an AsyncSession the queries await the
+# asyncio driver; with a Session they run as before.
+
+DbSession = Union[Session, AsyncSession]
+
+
+async def create_task(task: TaskCreate, user_id: str, db: DbSession) -> Task:
+    """
+    Function that creates a new task.
+
+    :param task: Task data to be created.
+    :param user_id: ID of the user creating the task.
+    :param db: Database session.
+    :return: Task created.
+    """
+
+    return await run_db(db, task_crud.create_task, task=task, user_id=user_id)
+
+async def get_task_by_id(task_id: str, db: DbSession, user_id: Optional[str] = None) -> Optional[Task]:
+    """
+    Function that retrieves a task by its ID.
+
+    :param task_id: ID of the task.
+    :param db: Database session.
+    :param user_id: Only return the task if it belongs to this user.
+    :return: Task if found, otherwise None.
+    """
+
+    return await run_db(db, task_crud.get_task_by_id, task_id, user_id=user_id)
+
+async def get_tasks_version(user_id: str, db: DbSession) -> Optional[int]:
+    """
+    Function that retrieves the tasks version of a user.
+
+    :param user_id: ID of the user.
+    :param db: Database session.
+    :return: Tasks version, None if the user does not exist.
+    """
+
+    return await run_db(db, task_crud.get_tasks_version, user_id)
+
+async def get_task_by_user_id(user_id: str, db: DbSession) -> List[Task]:
+    """
+    Function that retrieves all tasks from a user.
+
+    :param user_id: ID of the user.
+    :param db: Database session.
+    :return: List of tasks.
+    """
+
+    return await run_db(db, task_crud.get_task_by_user_id, user_id)
+
+async def iter_task_rows_by_user_id(user_id: str, db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[Row]:
+    """
+    Function that iterates over the response columns of all tasks of a user,
+    ordered by creation date, batch_size rows at a time.
+
+    :param user_id: ID of the user.
+    :param db: Async database session.
+    :param batch_size: Number of rows fetched at a time.
+    :return: Async iterator of rows.
+    """
+
+    result = await db.stream(
+        task_crud.tasks_by_user_id_statement(user_id, batch_size, columns=task_crud.TASK_RESPONSE_COLUMNS)
+    )
+    async for row in result:
+        yield row
+
+async def get_tasks_page(user_id: str, db: DbSession, **filters) -> Tuple[List[Task], Optional[str]]:
+    """
+    Function that retrieves a page of the tasks of a user, see crud.task.get_tasks_page.
+
+    :param user_id: ID of the user.
+    :param db: Database session.
+    :param filters: limit, cursor, status, priority and deadline filters.
+    :return: Tasks of the page and the cursor of the next page, or None on the last page.
+    """
+
+    return await run_db(db, task_crud.get_tasks_page, user_id, **filters)
+
+async def delete_task_by_id(task_id: str, db: DbSession, user_id: Optional[str] = None) -> bool:
+    """
+    Function that deletes a task by its ID.
+
+    :param task_id: ID of the task to be deleted.
+    :param db: Database session.
+    :param user_id: Only delete the task if it belongs to this user.
+    :return: True if the task was deleted, otherwise False.
+    """
+
+    return await run_db(db, task_crud.delete_task_by_id, task_id, user_id=user_id)
+
+async def update_task_by_id(
+    task_id: str, task: TaskUpdate, db: DbSession, user_id: Optional[str] = None, version: Optional[int] = None
+):
+    """
+    Function that updates a task by its ID.
+
+    :param task_id: ID of the task to be updated.
+    :param task: Task data to be updated.
+    :param db: Database session.
+    :param user_id: Only update the task if it belongs to this user.
+    :param version: Only update the task if it is still at this version.
+    :return: Task updated, or None if not found or at another version.
+    """
+
+    return await run_db(db, task_crud.update_task_by_id, task_id, task, user_id=user_id, version=version)
+
+async def create_tasks(tasks: List[TaskCreate], user_id: str, db: DbSession) -> List[TaskBulkResult]:
+    """
+    Function that creates many tasks in one transaction.
+
+    :param tasks: Tasks data to be created.
+    :param user_id: ID of the user creating the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    return await run_db(db, task_crud.create_tasks, tasks=tasks, user_id=user_id)
+
+async def update_tasks(tasks: List[TaskBulkUpdate], user_id: str, db: DbSession) -> List[TaskBulkResult]:
+    """
+    Function that updates many tasks in one transaction.
+
+    :param tasks: Tasks data to be updated, each with the ID of the task.
+    :param user_id: ID of the user updating the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    return await run_db(db, task_crud.update_tasks, tasks=tasks, user_id=user_id)
+
+async def delete_tasks(task_ids: List[str], user_id: str, db: DbSession) -> List[TaskBulkResult]:
+    """
+    Function that deletes many tasks in one statement.
+
+    :param task_ids: IDs of the tasks to be deleted.
+    :param user_id: ID of the user deleting the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    return await run_db(db, task_crud.delete_tasks, task_ids=task_ids, user_id=user_id)
@@ -0,0 +1,71 @@
+from typing import Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from crud import user as user_crud
+from db.async_database import run_db
+from schemas.user import UserCreate, UserInDB
+
+# Async versions of crud.user. With an AsyncSession the queries await the
+# asyncio driver; with a Session they run as before.
+
+DbSession = Union[Session, AsyncSession]
+
+
+async def create_user(user: UserCreate, db: DbSession):
+    """
+    Create a user.
+
+    :param db: Database session
+    :param user: User to create
+    :return: User created
+    """
+    return await run_db(db, user_crud.create_user, user)
+
+
+async def get_user_by_username(user_username: str, db: DbSession):
+    """
+    Get a user by username.
+
+    :param db: Database session
+    :param user_username: Username of the user
+    :return: User
+    """
+    return await run_db(db, user_crud.get_user_by_username, user_username)
+
+
+async def get_user_by_email(user_email: str, db: DbSession):
+    """
+    Get a user by email.
+
+    :param db: Database session
+    :param user_email: Email of the user
+    :return: User
+    """
+    return await run_db(db, user_crud.get_user_by_email, user_email)
+
+
+async def get_user_by_id(user_id: str, db: DbSession):
+    """
+    Get a user by ID.
+
+    :param db: Database session
+    :param user_id: ID of the user
+    :return: User
+    """
+    return await run_db(db, user_crud.get_user_by_id, user_id)
+
+
+async def get_cached_user_by_username(user_username: str, db: DbSession) -> Optional[UserInDB]:
+    """
+    Get a user by username, going to the database only on a cache miss.
+
+    :param db: Database session
+    :param user_username: Username of the user
+    :return: User
+    """
+    user = user_crud.user_cache.get(user_username)
+    if user is None:
+        user = await run_db(db, user_crud.get_cached_user_by_username, user_username)
+    return user
@@ -1,10 +1,76 @@
+import base64
+import json
+import os
+import uuid
+from collections import namedtuple
+from typing import Iterator, List, Optional, Tuple, Union
+from dotenv import load_dotenv
 from fastapi import Depends
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 
+from cache.response_cache import ResponseCache, create_backend
 from db.database import get_db
 from models.task import Task
-from schemas.task import TaskCreate, TaskUpdate
+from models.user import User
+from schemas.task import TaskBulkResult, TaskBulkUpdate, TaskCreate, TaskInDB, TaskUpdate
+
+load_dotenv()
+
+# "memory" for a cache per process, "redis" for one shared between processes
+TASK_LIST_CACHE_BACKEND = os.environ.get("TASK_LIST_CACHE_BACKEND", "memory")
+TASK_LIST_CACHE_SIZE = int(os.environ.get("TASK_LIST_CACHE_SIZE", 10000))
+TASK_LIST_CACHE_TTL = float(os.environ.get("TASK_LIST_CACHE_TTL", 30))
+TASK_LIST_CACHE_REDIS_URL = os.environ.get("TASK_LIST_CACHE_REDIS_URL")
+
+# Columns of TaskInDB, in its field order
+TASK_RESPONSE_COLUMNS = [Task.__table__.c[field] for field in TaskInDB.model_fields]
+
+# Read-only task with the fields of TaskInDB, not tracked by the session
+TaskRow = namedtuple("TaskRow", TaskInDB.model_fields)
+
+# Serialized task list responses, per user, dropped on every write to their tasks
+task_list_cache = ResponseCache(
+    create_backend(TASK_LIST_CACHE_BACKEND, TASK_LIST_CACHE_SIZE, TASK_LIST_CACHE_TTL, TASK_LIST_CACHE_REDIS_URL),
+    namespace="tasks",
+)
+
+def deadline_in_past(deadline: Optional[datetime]) -> bool:
+    """
+    Function that checks if a deadline is in the past. Naive dates are taken as UTC.
+
+    :param deadline: Deadline of a task.
+    :return: True if the deadline is in the past.
+    """
+
+    if deadline is None:
+        return False
+    if deadline.tzinfo is None:
+        deadline = deadline.replace(tzinfo=timezone.utc)
+    return deadline < datetime.now(timezone.utc)
+
+def bump_tasks_version(user_id: str, db: Session = Depends(get_db)):
+    """
+    Function that increments the tasks version of a user, in the current transaction.
+
+    :param user_id: ID of the user.
+    :param db: Database session.
+    """
+
+    db.execute(update(User).where(User.id == user_id).values(tasks_version=User.tasks_version + 1))
+
+def get_tasks_version(user_id: str, db: Session = Depends(get_db)) -> Optional[int]:
+    """
+    Function that retrieves the tasks version of a user, which changes on every write to their tasks.
+
+    :param user_id: ID of the user.
+    :param db: Database session.
+    :return: Tasks version, None if the user does not exist.
+    """
+
+    return db.scalar(select(User.tasks_version).where(User.id == user_id))
 
 def create_task(task: TaskCreate, user_id: str, db: Session = Depends(get_db)):
     """
@@ -16,73 +82,369 @@ def create_task(task: TaskCreate, user_id: str, db: Session = Depends(get_db)):
     """
 
     new_task = Task(**task.model_dump(), user_id=user_id)
-    if new_task.deadline and new_task.deadline < datetime.now(timezone.utc):
+    if deadline_in_past(new_task.deadline):
         raise ValueError("Deadline must be in the future.")
 
     db.add(new_task)
+    bump_tasks_version(user_id, db)
     db.commit()
+    task_list_cache.invalidate(user_id)
     db.refresh(new_task)
 
     return new_task
 
-def get_task_by_id(task_id: str, db: Session = Depends(get_db)):
+def get_task_by_id(task_id: str, db: Session = Depends(get_db), user_id: Optional[str] = None):
     """
     Function that retrieves a task by its ID.
 
     :param task_id: ID of the task to be retrieved.
     :param db: Database session.
-    :return: Task retrieved.
+    :param user_id: When given, only a task owned by this user is returned.
+    :return: Task retrieved, None if it was not found.
     """
 
-    return db.query(Task).filter(Task.id == task_id).first()
+    query = db.query(Task).filter(Task.id == task_id)
+    if user_id is not None:
+        query = query.filter(Task.user_id == user_id)
+    return query.first()
 
-def get_task_by_user_id(user_id: str, db: Session = Depends(get_db)):
+def get_task_by_user_id(user_id: str, db: Session = Depends(get_db), as_rows: bool = False):
     """
-    Function that retrieves a task by its ID.
+    Function that retrieves all tasks from a user.
 
-    :param task_id: ID of the task to be retrieved.
+    :param user_id: ID of the user.
+    :param db: Database session.
+    :param as_rows: Return read-only TaskRow tuples instead of Task objects.
+    :return: Tasks retrieved.
+    """
+
+    query = db.query(*TASK_RESPONSE_COLUMNS) if as_rows else db.query(Task)
+    tasks = query.filter(Task.user_id == user_id).order_by(Task.created_at).all()
+    return [TaskRow._make(task) for task in tasks] if as_rows else tasks
+
+def iter_task_rows_by_user_id(user_id: str, db: Session = Depends(get_db), batch_size: int = 1000) -> Iterator[Row]:
+    """
+    Function that iterates over the response columns of all tasks of a user,
+    as plain result rows that are not tracked by the session, ordered by
+    creation date.
+
+    Rows are read through a server-side cursor, batch_size at a time, so
+    memory use does not grow with the number of tasks.
+
+    :param user_id: ID of the user.
+    :param db: Database session.
+    :param batch_size: Number of rows fetched at a time.
+    :return: Iterator of rows.
+    """
+
+    yield from db.execute(tasks_by_user_id_statement(user_id, batch_size, columns=TASK_RESPONSE_COLUMNS))
+
+def tasks_by_user_id_statement(user_id: str, batch_size: int = 1000, columns: Optional[list] = None):
+    """
+    Function that builds the query of all tasks of a user, ordered by creation date.
+
+    :param user_id: ID of the user.
+    :param batch_size: Number of rows fetched at a time.
+    :param columns: Columns to select, Task objects when omitted.
+    :return: Select statement.
+    """
+
+    return (
+        select(*(columns or [Task]))
+        .where(Task.user_id == user_id)
+        .order_by(Task.created_at, Task.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+def encode_cursor(task: Task) -> str:
+    """
+    Function that encodes the position of a task in the task list.
+
+    :param task: Last task of a page.
+    :return: Opaque cursor.
+    """
+
+    position = json.dumps([task.created_at.isoformat(), task.id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Function that decodes a cursor created by encode_cursor.
+
+    :param cursor: Opaque cursor.
+    :return: Creation date and ID of the last task of the previous page.
+
+    :raises ValueError: If the cursor is invalid.
+    """
+
+    try:
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), str(task_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+def get_tasks_page(
+    user_id: str,
+    db: Session = Depends(get_db),
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    priority_min: Optional[int] = None,
+    priority_max: Optional[int] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    as_rows: bool = False,
+) -> Tuple[Union[List[Task], List[TaskRow]], Optional[str]]:
+    """
+    Function that retrieves a page of the tasks of a user, ordered by creation date.
+
+    Pages are read with keyset pagination on (created_at, id), so each page
+    costs the same regardless of its position in the list.
+
+    :param user_id: ID of the user.
     :param db: Database session.
-    :return: Task retrieved.
+    :param limit: Maximum number of tasks, all tasks when None.
+    :param cursor: Cursor returned with the previous page.
+    :param status: Only tasks with this status.
+    :param priority_min: Only tasks with at least this priority.
+    :param priority_max: Only tasks with at most this priority.
+    :param deadline_from: Only tasks with a deadline at or after this date.
+    :param deadline_to: Only tasks with a deadline at or before this date.
+    :param as_rows: Return read-only TaskRow tuples with only the response
+        columns, instead of Task objects loaded into the session.
+    :return: Tasks of the page and the cursor of the next page, None on the last page.
+
+    :raises ValueError: If the cursor is invalid.
     """
 
-    return db.query(Task).filter(Task.user_id == user_id).order_by(Task.created_at).all()
+    query = db.query(*TASK_RESPONSE_COLUMNS) if as_rows else db.query(Task)
+    query = query.filter(Task.user_id == user_id)
+
+    if status is not None:
+        query = query.filter(Task.status == status)
+    if priority_min is not None:
+        query = query.filter(Task.priority >= priority_min)
+    if priority_max is not None:
+        query = query.filter(Task.priority <= priority_max)
+    if deadline_from is not None:
+        query = query.filter(Task.deadline >= deadline_from)
+    if deadline_to is not None:
+        query = query.filter(Task.deadline <= deadline_to)
+
+    if cursor is not None:
+        created_at, task_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Task.created_at, Task.id) > (created_at, task_id))
 
-def delete_task_by_id(task_id: str, db: Session = Depends(get_db)):
+    query = query.order_by(Task.created_at, Task.id)
+    if limit is not None:
+        # One extra row tells if there is a next page
+        query = query.limit(limit + 1)
+
+    tasks = query.all()
+    if as_rows:
+        tasks = [TaskRow._make(task) for task in tasks]
+    if limit is not None and len(tasks) > limit:
+        tasks = tasks[:limit]
+        return tasks, encode_cursor(tasks[-1])
+    return tasks, None
+
+def delete_task_by_id(task_id: str, db: Session = Depends(get_db), user_id: Optional[str] = None) -> bool:
     """
-    Function that deletes a task by its ID.
+    Function that deletes a task by its ID with a single DELETE statement.
 
     :param task_id: ID of the task to be deleted.
     :param db: Database session.
-    :return: Task deleted.
+    :param user_id: When given, only a task owned by this user is deleted.
+    :return: True if the task was deleted, False if it was not found.
     """
 
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if task is None:
-        raise ValueError("Task not found.")
+    statement = delete(Task).where(Task.id == task_id)
+    if user_id is not None:
+        statement = statement.where(Task.user_id == user_id)
+    else:
+        user_id = db.scalar(select(Task.user_id).where(Task.id == task_id))
 
-    db.delete(task)
+    deleted = db.execute(statement).rowcount > 0
+    if deleted:
+        bump_tasks_version(user_id, db)
     db.commit()
+    if deleted:
+        task_list_cache.invalidate(user_id)
+
+    return deleted
 
-    return task
+def update_values(task: Union[TaskUpdate, TaskBulkUpdate]) -> dict:
+    """
+    Function that gets the fields to write for an update.
+
+    Only the fields that were sent are written, and None is ignored for
+    columns that cannot be null.
 
-def update_task_by_id(task_id: str, task: TaskUpdate, db: Session = Depends(get_db)):
+    :param task: Task data to be updated.
+    :return: Column values to write.
     """
-    Function that updates a task by its ID.
+
+    return {
+        key: value
+        for key, value in task.model_dump(exclude_unset=True, exclude={"id"}).items()
+        if value is not None or Task.__table__.c[key].nullable
+    }
+
+def update_task_by_id(
+    task_id: str,
+    task: TaskUpdate,
+    db: Session = Depends(get_db),
+    user_id: Optional[str] = None,
+    version: Optional[int] = None,
+):
+    """
+    Function that updates a task by its ID with a single UPDATE statement.
+
+    Only the fields set in task are written. The updated row is read back
+    with RETURNING when the database supports it, otherwise with a SELECT
+    in the same transaction.
 
     :param task_id: ID of the task to be updated.
     :param task: Task data to be updated.
     :param db: Database session.
-    :return: Task updated.
+    :param user_id: When given, only a task owned by this user is updated.
+    :param version: When given, the task is only updated if it is still at this version.
+    :return: Task updated, None if it was not found or is at another version.
     """
 
-    task_db = db.query(Task).filter(Task.id == task_id).first()
-    if task_db is None:
-        raise ValueError("Task not found.")
+    values = update_values(task)
+    condition = [Task.id == task_id]
+    if user_id is not None:
+        condition.append(Task.user_id == user_id)
+    if version is not None:
+        condition.append(Task.version == version)
 
-    for key, value in task.dict().items():
-        setattr(task_db, key, value)
+    if not values:
+        return db.execute(select(*Task.__table__.c).where(*condition)).first()
 
+    statement = update(Task).where(*condition).values(**values, version=Task.version + 1)
+    if db.get_bind().dialect.update_returning:
+        task_db = db.execute(statement.returning(*Task.__table__.c)).first()
+    elif db.execute(statement).rowcount > 0:
+        task_db = db.execute(select(*Task.__table__.c).where(*condition)).first()
+    else:
+        task_db = None
+    if task_db is not None:
+        bump_tasks_version(task_db.user_id, db)
     db.commit()
-    db.refresh(task_db)
+    if task_db is not None:
+        task_list_cache.invalidate(task_db.user_id)
 
     return task_db
+
+def create_tasks(tasks: List[TaskCreate], user_id: str, db: Session = Depends(get_db)) -> List[TaskBulkResult]:
+    """
+    Function that creates many tasks with a single multi-row insert.
+
+    Tasks without a deadline or with a deadline in the past are reported and
+    skipped, the others are created in one transaction.
+
+    :param tasks: Tasks data to be created.
+    :param user_id: ID of the user creating the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    created_at = datetime.now(timezone.utc)
+    # The tasks share created_at, so ascending IDs keep them in the order received
+    # when listed by (created_at, id), whatever the precision of the column
+    task_ids = iter(sorted(str(uuid.uuid4()) for _ in tasks))
+    rows = []
+    results = []
+    for index, task in enumerate(tasks):
+        task_id = next(task_ids)
+        if task.deadline is None:
+            results.append(TaskBulkResult(index=index, status="error", detail="Deadline is required."))
+            continue
+        if deadline_in_past(task.deadline):
+            results.append(TaskBulkResult(index=index, status="error", detail="Deadline must be in the future."))
+            continue
+
+        rows.append({**task.model_dump(), "id": task_id, "user_id": user_id, "created_at": created_at})
+        results.append(TaskBulkResult(index=index, id=task_id, status="created"))
+
+    if rows:
+        db.execute(insert(Task), rows)
+        bump_tasks_version(user_id, db)
+        db.commit()
+        task_list_cache.invalidate(user_id)
+
+    return results
+
+def get_owned_task_ids(task_ids: List[str], user_id: str, db: Session = Depends(get_db)) -> set:
+    """
+    Function that filters task IDs down to the ones owned by a user.
+
+    :param task_ids: IDs of the tasks.
+    :param user_id: ID of the user.
+    :param db: Database session.
+    :return: IDs of the tasks that exist and belong to the user.
+    """
+
+    if not task_ids:
+        return set()
+    return set(db.scalars(select(Task.id).where(Task.user_id == user_id, Task.id.in_(set(task_ids)))))
+
+def update_tasks(tasks: List[TaskBulkUpdate], user_id: str, db: Session = Depends(get_db)) -> List[TaskBulkResult]:
+    """
+    Function that updates many tasks of a user with executemany updates.
+
+    Only the fields sent for each task are written. Tasks that do not exist or
+    belong to another user are reported as not found.
+
+    :param tasks: Tasks data to be updated.
+    :param user_id: ID of the user updating the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    owned_ids = get_owned_task_ids([task.id for task in tasks], user_id, db)
+    rows = []
+    results = []
+    for index, task in enumerate(tasks):
+        if task.id not in owned_ids:
+            results.append(TaskBulkResult(index=index, id=task.id, status="not_found", detail="Task not found."))
+            continue
+
+        values = update_values(task)
+        if values:
+            rows.append({"id": task.id, **values})
+        results.append(TaskBulkResult(index=index, id=task.id, status="updated"))
+
+    if rows:
+        # ORM bulk UPDATE by primary key, grouped into one executemany per set of fields
+        db.execute(update(Task).values(version=Task.version + 1), rows)
+        bump_tasks_version(user_id, db)
+        db.commit()
+        task_list_cache.invalidate(user_id)
+
+    return results
+
+def delete_tasks(task_ids: List[str], user_id: str, db: Session = Depends(get_db)) -> List[TaskBulkResult]:
+    """
+    Function that deletes many tasks of a user with a single statement.
+
+    :param task_ids: IDs of the tasks to be deleted.
+    :param user_id: ID of the user deleting the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    owned_ids = get_owned_task_ids(task_ids, user_id, db)
+    if owned_ids:
+        db.execute(delete(Task).where(Task.user_id == user_id, Task.id.in_(owned_ids)))
+        bump_tasks_version(user_id, db)
+        db.commit()
+        task_list_cache.invalidate(user_id)
+
+    return [
+        TaskBulkResult(index=index, id=task_id, status="deleted")
+        if task_id in owned_ids
+        else TaskBulkResult(index=index, id=task_id, status="not_found", detail="Task not found.")
+        for index, task_id in enumerate(task_ids)
+    ]
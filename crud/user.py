@@ -1,9 +1,23 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
 from fastapi import Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 
+from cache.ttl_cache import TTLCache
 from db.database import get_db
 from models.user import User as UserModel
-from schemas.user import UserCreate
+from schemas.user import UserCreate, UserInDB
+
+load_dotenv()
+
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 300))
+
+# Process-local cache of username -> UserInDB
+user_cache = TTLCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
 
 
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
@@ -51,4 +65,55 @@ def get_user_by_id(user_id: str, db: Session = Depends(get_db)):
     :param user_id: ID of the user
     :return: User
     """
-    return db.query(UserModel).filter(UserModel.id == user_id).first()
\ No newline at end of file
+    return db.query(UserModel).filter(UserModel.id == user_id).first()
+
+
+def get_cached_user_by_username(
+    user_username: str, db: Session = Depends(get_db)
+) -> Optional[UserInDB]:
+    """
+    Get a user by username, going to the database only on a cache miss.
+
+    :param db: Database session
+    :param user_username: Username of the user
+    :return: User
+    """
+    user = user_cache.get(user_username)
+    if user is None:
+        user_db = get_user_by_username(user_username, db)
+        if user_db is None:
+            return None
+        user = UserInDB.model_validate(user_db)
+        user_cache.set(user_username, user)
+    return user
+
+
+def invalidate_user_cache(user_username: str):
+    """
+    Remove a user from the user cache.
+
+    :param user_username: Username of the user
+    """
+    user_cache.delete(user_username)
+
+
+@event.listens_for(UserModel, "after_insert")
+@event.listens_for(UserModel, "after_update")
+@event.listens_for(UserModel, "after_delete")
+def _record_changed_user(mapper, connection, target):
+    # Invalidated after commit: until then other requests still read the old row
+    # and could cache it again. Covers the previous username too, when it changed
+    history = inspect(target).attrs.username.history
+    session = object_session(target)
+    session.info.setdefault("changed_usernames", set()).update({target.username, *history.deleted})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_username in session.info.pop("changed_usernames", ()):
+        invalidate_user_cache(user_username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_usernames", None)
@@ -0,0 +1,152 @@
+import os
+from typing import Callable, Optional, Union
+
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from db.database import (
+    DB_CONNECT_TIMEOUT,
+    DB_REPLICA_CHECK_INTERVAL,
+    DB_REPLICA_RETRY_INTERVAL,
+    DB_REPLICA_URLS,
+    SQLALCHEMY_DATABASE_URL,
+    close_request_db,
+    engine_options,
+    get_db,
+    sticky_users,
+)
+from db.routing import ReplicaSet, RoutingSession
+from metrics.prometheus import phase_timer
+
+load_dotenv()
+
+# "sync" runs queries with pymysql, "async" with an asyncio driver
+DB_MODE = os.environ.get("DB_MODE", "sync").lower()
+MYSQL_ASYNC_DRIVER = os.environ.get("MYSQL_ASYNC_DRIVER", "aiomysql")
+
+ASYNC_DRIVERS = {"mysql": f"mysql+{MYSQL_ASYNC_DRIVER}", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Get the asyncio driver URL for a database URL.
+
+    :param url: Database URL.
+    :return: Same database with an asyncio driver.
+    """
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_MYSQL_URL", async_database_url(SQLALCHEMY_DATABASE_URL))
+
+
+def async_engine_options(url: str) -> dict:
+    """
+    Get the create_async_engine options for a database URL, from the environment.
+
+    :param url: Database URL.
+    :return: Keyword arguments for create_async_engine.
+    """
+    options = engine_options(url)
+    if "poolclass" in options:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    if make_url(url).get_backend_name() == "mysql":
+        # aiomysql and asyncmy have no read/write timeouts
+        options["connect_args"] = {"connect_timeout": DB_CONNECT_TIMEOUT}
+    return options
+
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the async engine, creating it on first use so the asyncio driver is
+    only needed in async mode.
+
+    :return: Async engine.
+    """
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_engine_options(ASYNC_DATABASE_URL))
+        replicas = None
+        if DB_REPLICA_URLS:
+            urls = [async_database_url(url) for url in DB_REPLICA_URLS]
+            replicas = ReplicaSet(
+                [create_async_engine(url, **async_engine_options(url)).sync_engine for url in urls],
+                check_interval=DB_REPLICA_CHECK_INTERVAL,
+                retry_interval=DB_REPLICA_RETRY_INTERVAL,
+            )
+        _async_session_factory = async_sessionmaker(
+            bind=_async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+            sync_session_class=RoutingSession,
+            replicas=replicas,
+            sticky_users=sticky_users,
+        )
+    return _async_engine
+
+
+def create_async_session() -> AsyncSession:
+    """
+    Create a session of the async engine.
+
+    :return: Async database session.
+    """
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def get_async_db(request: Request):
+    db = getattr(request.state, "db", None)
+    if db is None:
+        db = request.state.db = create_async_session()
+    try:
+        yield db
+    finally:
+        request.state.db = None
+        await db.close()
+
+
+async def close_request_db_async(request: Request):
+    """
+    Close the database session of a request, if one was created, in either mode.
+
+    :param request: HTTP request.
+    """
+    db = getattr(request.state, "db", None)
+    if isinstance(db, AsyncSession):
+        request.state.db = None
+        await db.close()
+    else:
+        close_request_db(request)
+
+
+async def run_db(db: Union[Session, AsyncSession], func: Callable, *args, **kwargs):
+    """
+    Run a synchronous CRUD function with a session of either mode.
+
+    With an AsyncSession the function runs through run_sync, so its queries
+    await the asyncio driver instead of blocking the event loop.
+
+    :param db: Database session.
+    :param func: CRUD function taking the session as its db argument.
+    :return: Result of the function.
+    """
+    with phase_timer("db"):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(lambda session: func(*args, db=session, **kwargs))
+        return func(*args, db=db, **kwargs)
+
+
+# Dependency of the routes, selected by DB_MODE
+get_session = get_async_db if DB_MODE == "async" else get_db
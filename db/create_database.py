@@ -1,9 +1,10 @@
 from models.task import Task
 from models.user import User
 from db.database import engine
+from db.migrations import apply_migrations
 
 
 def create_tables():
     Task.metadata.create_all(bind=engine)
     User.metadata.create_all(bind=engine)
-    
\ No newline at end of file
+    apply_migrations(engine)
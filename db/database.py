@@ -1,10 +1,17 @@
 import os
 
+from fastapi import Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from cache.ttl_cache import TTLCache
+from db.pool_metrics import InstrumentedQueuePool
+from db.query_stats import listen_queries
+from db.routing import ReplicaSet, RoutingSession
+
 load_dotenv()
 
 MYSQL_DATABASE = os.environ.get("MYSQL_DATABASE")
@@ -16,15 +23,128 @@ SQLALCHEMY_DATABASE_URL = os.environ.get(
     f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DATABASE}",
 )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Connection pool
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+# Recycle connections before MySQL's wait_timeout closes them
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+# Driver timeouts, in seconds
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", 10))
+DB_READ_TIMEOUT = int(os.environ.get("DB_READ_TIMEOUT", 30))
+DB_WRITE_TIMEOUT = int(os.environ.get("DB_WRITE_TIMEOUT", 30))
+
+# Read replicas, comma separated URLs
+DB_REPLICA_URLS = [url.strip() for url in os.environ.get("DB_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", 5))
+DB_REPLICA_RETRY_INTERVAL = float(os.environ.get("DB_REPLICA_RETRY_INTERVAL", 30))
+# Seconds a user's reads stay on the primary after they write
+DB_STICKY_PRIMARY_SECONDS = float(os.environ.get("DB_STICKY_PRIMARY_SECONDS", 5))
+
+# Statements slower than this, in seconds, are logged with their query plan; empty to log none
+DB_SLOW_QUERY_THRESHOLD = os.environ.get("DB_SLOW_QUERY_THRESHOLD", "0.5")
+DB_SLOW_QUERY_THRESHOLD = float(DB_SLOW_QUERY_THRESHOLD) if DB_SLOW_QUERY_THRESHOLD else None
+DB_SLOW_QUERY_EXPLAIN = os.environ.get("DB_SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+# Log the values of the parameters of slow statements, not only their types; for debugging only
+DB_SLOW_QUERY_LOG_PARAMETERS = os.environ.get("DB_SLOW_QUERY_LOG_PARAMETERS", "false").lower() == "true"
+
+
+def engine_options(url: str) -> dict:
+    """
+    Get the create_engine options for a database URL, from the environment.
+
+    :param url: Database URL.
+    :return: Keyword arguments for create_engine.
+    """
+    options = {
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "connect_args": {},
+    }
+
+    url = make_url(url)
+    if url.get_backend_name() == "mysql":
+        options["connect_args"] = {
+            "connect_timeout": DB_CONNECT_TIMEOUT,
+            "read_timeout": DB_READ_TIMEOUT,
+            "write_timeout": DB_WRITE_TIMEOUT,
+        }
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+# Every engine, so the replicas and the async engine are counted too
+listen_queries(
+    Engine,
+    slow_query_threshold=DB_SLOW_QUERY_THRESHOLD,
+    explain_slow_queries=DB_SLOW_QUERY_EXPLAIN,
+    log_parameter_values=DB_SLOW_QUERY_LOG_PARAMETERS,
+)
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+
+replicas = (
+    ReplicaSet(
+        [create_engine(url, **engine_options(url)) for url in DB_REPLICA_URLS],
+        check_interval=DB_REPLICA_CHECK_INTERVAL,
+        retry_interval=DB_REPLICA_RETRY_INTERVAL,
+    )
+    if DB_REPLICA_URLS
+    else None
+)
+# Users who wrote recently, their reads go to the primary
+sticky_users = TTLCache(max_size=100000, ttl=DB_STICKY_PRIMARY_SECONDS)
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replicas=replicas,
+    sticky_users=sticky_users,
+)
+
+# Checkout latency, in-use and overflow counts of the engine's pool
+pool_metrics = getattr(engine.pool, "metrics", None)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+def get_request_db(request: Request) -> Session:
+    """
+    Get the database session of a request, creating it on first use.
+
+    :param request: HTTP request.
+    :return: Database session of the request.
+    """
+    db = getattr(request.state, "db", None)
+    if db is None:
+        db = request.state.db = SessionLocal()
+    return db
+
+
+def close_request_db(request: Request):
+    """
+    Close the database session of a request, if one was created.
+
+    :param request: HTTP request.
+    """
+    db = getattr(request.state, "db", None)
+    if db is not None:
+        request.state.db = None
+        db.close()
+
+
+def get_db(request: Request):
+    db = get_request_db(request)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        close_request_db(request)
@@ -0,0 +1,39 @@
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
+from db.database import Base, engine as default_engine
+
+
+def apply_migrations(engine: Engine = default_engine):
+    """
+    Bring an existing database up to date with the models.
+
+    create_all only creates missing tables, so the columns and indexes
+    declared on the models after a table was created are added here. New
+    columns need a server default to fill the existing rows.
+
+    :param engine: Engine of the database to migrate.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                logging.info(f"Adding column {column.name} to {table.name}")
+                column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                with engine.begin() as connection:
+                    connection.execute(
+                        text(f"ALTER TABLE {engine.dialect.identifier_preparer.format_table(table)} ADD COLUMN {column_ddl}")
+                    )
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                logging.info(f"Creating index {index.name} on {table.name}")
+                index.create(bind=engine)
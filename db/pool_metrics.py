@@ -0,0 +1,91 @@
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Counters of a connection pool.
+
+    Hooks added with add_hook are called after every checkout with the time
+    spent waiting for the connection and the metrics object, so they can
+    forward the values to a monitoring system.
+    """
+
+    def __init__(self, pool: Optional[Pool] = None):
+        self.pool = pool
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_time_total = 0.0
+        self.checkout_time_max = 0.0
+        self.hooks: List[Callable[[float, "PoolMetrics"], None]] = []
+
+    def add_hook(self, hook: Callable[[float, "PoolMetrics"], None]):
+        """
+        Register a function called after every checkout.
+
+        :param hook: Function receiving the checkout wait in seconds and the metrics.
+        """
+        self.hooks.append(hook)
+
+    def observe_checkout(self, wait: float, timed_out: bool = False):
+        """
+        Record a checkout.
+
+        :param wait: Time spent waiting for the connection, in seconds.
+        :param timed_out: Whether the checkout gave up waiting.
+        """
+        if timed_out:
+            self.checkout_timeouts += 1
+        else:
+            self.checkouts += 1
+        self.checkout_time_total += wait
+        self.checkout_time_max = max(self.checkout_time_max, wait)
+        for hook in self.hooks:
+            hook(wait, self)
+
+    def snapshot(self) -> dict:
+        """
+        Get the current state of the pool.
+
+        :return: Dictionary with the pool size, connections in use, overflow and checkout counters.
+        """
+        pool = self.pool
+        return {
+            "size": pool.size() if pool is not None else 0,
+            "in_use": pool.checkedout() if pool is not None else 0,
+            "overflow": max(pool.overflow(), 0) if pool is not None else 0,
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_time_total": self.checkout_time_total,
+            "checkout_time_max": self.checkout_time_max,
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waits for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics(self)
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.observe_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # engine.dispose() replaces the pool, the metrics carry over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        self.metrics.pool = pool
+        return pool
@@ -0,0 +1,145 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+
+
+class QueryStats:
+    """
+    Number of SQL statements run and time spent in them, for one request.
+    """
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+# Stats of the current request, None outside of a request
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+# Prefix of the statement showing the query plan, by dialect
+EXPLAIN_PREFIXES = {"mysql": "EXPLAIN ", "mariadb": "EXPLAIN ", "postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+
+def explain(conn, statement: str, parameters) -> Optional[list]:
+    """
+    Get the query plan of a SELECT statement.
+
+    :param conn: Connection that ran the statement.
+    :param statement: SQL statement, as sent to the driver.
+    :param parameters: Parameters of the statement.
+    :return: Rows of the plan, or None when it can not be explained.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith("SELECT"):
+        return None
+
+    # A separate cursor of the same DBAPI connection, so no event is fired
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [tuple(row) for row in cursor.fetchall()]
+    except Exception as e:
+        logging.warning(f"Could not explain slow query: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def redact_parameters(parameters, executemany: bool = False):
+    """
+    Describe the parameters of a statement without their values, which can be
+    personal data or secrets.
+
+    :param parameters: Parameters of the statement, as sent to the driver.
+    :param executemany: Whether the parameters are a list of parameter sets.
+    :return: Type names in place of the values, or the number of parameter sets.
+    """
+    if executemany:
+        return f"{len(parameters)} parameter sets"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def listen_queries(
+    target,
+    slow_query_threshold: Optional[float] = None,
+    explain_slow_queries: bool = True,
+    log_parameter_values: bool = False,
+):
+    """
+    Count the statements run by an engine in the stats of the current request,
+    and log the slow ones.
+
+    :param target: Engine, or the Engine class for every engine.
+    :param slow_query_threshold: Seconds from which a statement is logged, None to log none.
+    :param explain_slow_queries: Whether to log the query plan of slow SELECT statements.
+    :param log_parameter_values: Whether to log the values of the parameters of slow
+        statements, for debugging only, instead of their types.
+    """
+
+    @event.listens_for(target, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_start = time.perf_counter()
+
+    @event.listens_for(target, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.query_start
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+
+        if slow_query_threshold is None or duration < slow_query_threshold:
+            return
+        plan = None
+        # Another query can not run while a streamed result is being read
+        if explain_slow_queries and not executemany and not context.execution_options.get("stream_results"):
+            plan = explain(conn, statement, parameters)
+        if not log_parameter_values:
+            parameters = redact_parameters(parameters, executemany)
+        logging.warning(f"Slow query ({duration * 1000:.1f} ms): {statement} Parameters: {parameters} Plan: {plan}")
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Count the statements run inside the block, e.g. to check the number of
+    queries of a CRUD function in a test.
+
+    :return: Stats of the block, with the statements run.
+    """
+    stats = QueryStats(keep_statements=True)
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def assert_max_queries(response, maximum: int):
+    """
+    Check that an endpoint ran at most a number of statements, from the
+    X-DB-Query-Count header of its response.
+
+    :param response: Response of the endpoint.
+    :param maximum: Maximum number of statements.
+
+    :raises AssertionError: If the endpoint ran more statements.
+    """
+    count = int(response.headers["X-DB-Query-Count"])
+    assert count <= maximum, f"{response.request.method} {response.request.url.path} ran {count} queries, expected at most {maximum}"
@@ -0,0 +1,144 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Delete, Insert, Select, Update
+
+from cache.ttl_cache import TTLCache
+
+
+class ReplicaSet:
+    """
+    Read replicas, handed out round-robin.
+
+    A replica is probed before use at most every check_interval seconds. One
+    that fails the probe, or whose connection breaks while in use, is skipped
+    for retry_interval seconds.
+    """
+
+    def __init__(self, engines: Sequence[Engine], check_interval: float = 5, retry_interval: float = 30):
+        self.engines = list(engines)
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self.down_until: Dict[Engine, float] = {}
+        self.checked_at: Dict[Engine, float] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def _handle_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, engine: Engine):
+        """
+        Skip a replica for retry_interval seconds.
+
+        :param engine: Engine of the replica.
+        """
+        logging.warning(f"Database replica {engine.url.render_as_string()} is down.")
+        with self._lock:
+            self.down_until[engine] = time.monotonic() + self.retry_interval
+
+    def is_healthy(self, engine: Engine) -> bool:
+        """
+        Check a replica, probing it when the last check is too old.
+
+        :param engine: Engine of the replica.
+        :return: Whether the replica can be used.
+        """
+        now = time.monotonic()
+        if self.down_until.get(engine, 0) > now:
+            return False
+        if now - self.checked_at.get(engine, float("-inf")) < self.check_interval:
+            return True
+
+        try:
+            with engine.connect():
+                pass
+        except DBAPIError:
+            self.mark_down(engine)
+            return False
+        self.checked_at[engine] = now
+        return True
+
+    def get_engine(self) -> Optional[Engine]:
+        """
+        Get the next healthy replica.
+
+        :return: Engine of the replica, or None when all replicas are down.
+        """
+        for _ in range(len(self.engines)):
+            with self._lock:
+                engine = self.engines[next(self._counter) % len(self.engines)]
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a replica and everything else to its bind, the primary.
+
+    Once a session writes, it stays on the primary. When the session has a
+    user, set with set_session_user, that user's reads also stay on the
+    primary for the sticky window after a write, so they see their changes
+    despite replication lag.
+    """
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, sticky_users: Optional[TTLCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self.sticky_users = sticky_users
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.mark_written()
+            return primary
+
+        if self.replicas is None or not self.use_replica(clause):
+            return primary
+        return self.replicas.get_engine() or primary
+
+    def use_replica(self, clause) -> bool:
+        """
+        Check whether a statement can be read from a replica.
+
+        :param clause: Statement to execute.
+        :return: Whether to read from a replica.
+        """
+        if not isinstance(clause, Select) or clause._for_update_arg is not None:
+            return False
+        if self.info.get("written"):
+            return False
+        user_id = self.info.get("user_id")
+        return user_id is None or self.sticky_users is None or self.sticky_users.get(user_id) is None
+
+    def mark_written(self):
+        """
+        Keep the session, and its user for the sticky window, on the primary.
+        """
+        self.info["written"] = True
+        user_id = self.info.get("user_id")
+        if user_id is not None and self.sticky_users is not None:
+            self.sticky_users.set(user_id, True)
+
+
+def set_session_user(db, user_id: str):
+    """
+    Set the user of a session, used to keep their reads on the primary after a write.
+
+    :param db: Database session, sync or async.
+    :param user_id: ID of the user.
+    """
+    db.info["user_id"] = user_id
+
@@ -1,11 +1,23 @@
 from contextlib import asynccontextmanager
 from starlette import status
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from auth import async_user_auth, user_auth
+from auth.auth import jwks_provider
 from db.create_database import create_tables
-from db.database import SessionLocal
+from db.async_database import close_request_db_async
+from metrics.collectors import collect_app_metrics
+from metrics.middleware import MetricsMiddleware
+from metrics.profiling import (
+    PROFILE_DIR,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_SECRET,
+    PROFILE_SIGNATURE_TTL,
+    ProfilingMiddleware,
+)
+from metrics.prometheus import registry
 
 from routers import user, task
 
@@ -13,7 +25,11 @@ from routers import user, task
 @asynccontextmanager
 async def lifespan(app):
     create_tables()
+    jwks_provider.start()
+    # Created in the background, so neither startup nor the first login waits for boto3
+    async_user_auth.executor.submit(user_auth.get_cognito_client)
     yield
+    jwks_provider.stop()
 
 
 app = FastAPI(
@@ -35,8 +51,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-DB-Query-Count", "X-DB-Query-Time"],
 )
 
+registry.add_collector(collect_app_metrics)
+
 app.include_router(user.router)
 app.include_router(task.router)
 
@@ -50,9 +69,33 @@ app.include_router(task.router)
 def get_health():
     return {"status": "ok"}
 
+@app.get(
+    "/metrics",
+    tags=["monitoring"],
+    summary="Get the metrics of the API",
+    response_description="Metrics in the Prometheus text format",
+    status_code=status.HTTP_200_OK,
+)
+def get_metrics():
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.middleware("http")
 async def db_session_middleware(request: Request, call_next):
-    request.state.db = SessionLocal()
-    response = await call_next(request)
-    request.state.db.close()
-    return response
\ No newline at end of file
+    # The session is created by get_session only when a handler uses the database
+    try:
+        return await call_next(request)
+    finally:
+        await close_request_db_async(request)
+
+# Only installed when configured, so requests pay nothing otherwise
+if PROFILE_SECRET or PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        secret=PROFILE_SECRET,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        output_dir=PROFILE_DIR,
+        signature_ttl=PROFILE_SIGNATURE_TTL,
+    )
+
+# Outermost, so the latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
\ No newline at end of file
@@ -0,0 +1,73 @@
+from typing import List
+
+from auth.auth import token_cache
+from crud.task import task_list_cache
+from crud.user import user_cache
+from db.database import pool_metrics as db_pool_metrics
+from metrics.prometheus import Counter, Gauge, Metric
+
+POOL_GAUGES = {
+    "size": "Connections kept open by the database pool.",
+    "in_use": "Database connections checked out.",
+    "overflow": "Database connections opened above the pool size.",
+    "checkout_time_max": "Longest wait for a database connection, in seconds.",
+}
+POOL_COUNTERS = {
+    "checkouts": "Database connections checked out from the pool.",
+    "checkout_timeouts": "Database connection checkouts that timed out.",
+    "checkout_time_total": "Time spent waiting for database connections, in seconds.",
+}
+CACHE_COUNTERS = ("hits", "misses", "evictions", "invalidations")
+
+
+def pool_metrics(snapshot: dict) -> List[Metric]:
+    """
+    Get the metrics of a connection pool.
+
+    :param snapshot: Snapshot of db.pool_metrics.PoolMetrics.
+    :return: Metrics of the pool.
+    """
+    metrics = []
+    for field, documentation in POOL_GAUGES.items():
+        gauge = Gauge(f"db_pool_{field}", documentation)
+        gauge.set(snapshot[field])
+        metrics.append(gauge)
+    for field, documentation in POOL_COUNTERS.items():
+        counter = Counter(f"db_pool_{field}", documentation)
+        counter.inc(amount=snapshot[field])
+        metrics.append(counter)
+    return metrics
+
+
+def cache_metrics(caches: dict) -> List[Metric]:
+    """
+    Get the metrics of caches, labelled by cache name.
+
+    :param caches: Stats of each cache, by name, from TTLCache.stats or ResponseCache.stats.
+    :return: Metrics of the caches.
+    """
+    size = Gauge("cache_size", "Entries held by the cache.", ("cache",))
+    counters = {field: Counter(f"cache_{field}", f"Cache {field}.", ("cache",)) for field in CACHE_COUNTERS}
+    for name, stats in caches.items():
+        if "size" in stats:
+            size.set(stats["size"], name)
+        for field, counter in counters.items():
+            if field in stats:
+                counter.inc(name, amount=stats[field])
+    return [size, *counters.values()]
+
+
+def collect_app_metrics() -> List[Metric]:
+    """
+    Get the metrics of the database pool and the caches of the application.
+
+    :return: Metrics computed from their current counters.
+    """
+    metrics = pool_metrics(db_pool_metrics.snapshot()) if db_pool_metrics is not None else []
+    return metrics + cache_metrics(
+        {
+            "token": token_cache.stats(),
+            "user": user_cache.stats(),
+            "task_list": task_list_cache.stats(),
+        }
+    )
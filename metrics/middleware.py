@@ -0,0 +1,51 @@
+import time
+
+from db.query_stats import QueryStats, current_query_stats
+from metrics.prometheus import request_duration, request_queries, requests_in_flight
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that records the duration, status, route and SQL statements of every HTTP request.
+
+    Requests are labelled by the path template of their route, e.g.
+    /tasks/{task_id}, so the number of series does not grow with the IDs.
+    The number of statements and the time spent in them until the response
+    starts are returned in the X-DB-Query-Count and X-DB-Query-Time (ms) headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        query_stats = QueryStats()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-db-query-count", str(query_stats.count).encode()),
+                    (b"x-db-query-time", f"{query_stats.duration * 1000:.3f}".encode()),
+                ]
+            await send(message)
+
+        requests_in_flight.inc(method)
+        token = current_query_stats.set(query_stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_query_stats.reset(token)
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_duration.observe(time.perf_counter() - start, method, route, str(status_code))
+            request_queries.observe(query_stats.count, route)
+            requests_in_flight.dec(method)
@@ -0,0 +1,127 @@
+import cProfile
+import hashlib
+import hmac
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Requests with an X-Profile header signed with this secret are profiled
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET")
+# Fraction of all requests profiled, 0 for none
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# Seconds a signed header stays valid
+PROFILE_SIGNATURE_TTL = float(os.environ.get("PROFILE_SIGNATURE_TTL", 300))
+
+
+def profile_signature(secret: str, path: str, timestamp: int) -> str:
+    return hmac.new(secret.encode(), f"{timestamp}:{path}".encode(), hashlib.sha256).hexdigest()
+
+
+def sign_profile_request(secret: str, path: str, timestamp: Optional[int] = None) -> str:
+    """
+    Get the X-Profile header value that opts a request in to profiling.
+
+    :param secret: PROFILE_SECRET of the API.
+    :param path: Path of the request, e.g. /api/tasks.
+    :param timestamp: Time of signature, in epoch seconds, defaults to now.
+    :return: Header value, the timestamp and its HMAC-SHA256 signature.
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return f"{timestamp}.{profile_signature(secret, path, timestamp)}"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles the requests that opt in with cProfile.
+
+    A request is profiled when it has an X-Profile header signed by
+    sign_profile_request, or is picked by the sample rate. The profile is
+    written in the pstats format to the output directory, e.g. for snakeviz
+    or flameprof, and its file name returned in the X-Profile-File header.
+
+    cProfile records the event loop thread, so the work of other requests
+    running at the same time shows up too, and one request is profiled at a
+    time. Calls sent to a thread pool only show up as the time waited.
+    """
+
+    def __init__(
+        self,
+        app,
+        secret: Optional[str] = None,
+        sample_rate: float = 0.0,
+        output_dir: str = "profiles",
+        signature_ttl: float = 300,
+    ):
+        self.app = app
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.signature_ttl = signature_ttl
+        self._lock = threading.Lock()
+
+    def is_signed(self, scope) -> bool:
+        """
+        Check the X-Profile header of a request.
+
+        :param scope: ASGI scope of the request.
+        :return: Whether the header is signed with the secret and recent.
+        """
+        if not self.secret:
+            return False
+        header = next((value for name, value in scope["headers"] if name == b"x-profile"), None)
+        if header is None:
+            return False
+
+        timestamp, _, signature = header.decode("latin-1").partition(".")
+        try:
+            timestamp = int(timestamp)
+        except ValueError:
+            return False
+        if abs(time.time() - timestamp) > self.signature_ttl:
+            return False
+        return hmac.compare_digest(signature, profile_signature(self.secret, scope["path"], timestamp))
+
+    def profile_path(self, scope) -> str:
+        name = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        return os.path.join(self.output_dir, f"{time.time_ns()}-{scope['method']}-{name}.prof")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            self.is_signed(scope) or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Only one profiler can run in a thread
+        if not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        path = self.profile_path(scope)
+
+        async def send_with_profile_file(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-file", os.path.basename(path).encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            await self.app(scope, receive, send_with_profile_file)
+        finally:
+            profiler.disable()
+            self._lock.release()
+            try:
+                os.makedirs(self.output_dir, exist_ok=True)
+                profiler.dump_stats(path)
+            except OSError as e:
+                logging.error(f"Could not write profile {path}: {e}")
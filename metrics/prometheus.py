@@ -0,0 +1,228 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Name, labels and value of a sample
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + "}"
+
+
+class Metric:
+    """
+    Metric with a value per combination of label values.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield self.name, dict(zip(self.labels, label_values)), value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """
+    Value that only goes up, e.g. a number of requests.
+    """
+
+    type = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down, e.g. a number of requests in flight.
+    """
+
+    type = "gauge"
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets, with their count and sum.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values: str):
+        """
+        Record a value.
+
+        :param value: Observed value, e.g. a duration in seconds.
+        :param label_values: Values of the labels, in order.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                # Count per bucket, plus one for the values above the last bound, and the sum
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(label_values, list(counts), total) for label_values, (counts, total) in self._values.items()]
+        for label_values, counts, total in values:
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": format_value(bound)}, cumulative
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, total
+
+
+class Registry:
+    """
+    Metrics exposed on the metrics endpoint.
+
+    Collectors are functions called on every render that return metrics
+    computed on the spot, for values kept elsewhere like pool or cache counters.
+    """
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]):
+        """
+        Register a function returning metrics on every render.
+
+        :param collector: Function returning a list of metrics.
+        """
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        :return: Text of the metrics.
+        """
+        metrics = list(self.metrics)
+        for collector in self.collectors:
+            metrics.extend(collector())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(
+    Histogram("http_request_duration_seconds", "Duration of HTTP requests.", ("method", "route", "status"))
+)
+requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests being served.", ("method",))
+)
+request_queries = registry.register(
+    Histogram(
+        "http_request_db_queries", "SQL statements run by HTTP requests.", ("route",), buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100)
+    )
+)
+phase_duration = registry.register(
+    Histogram("app_phase_duration_seconds", "Duration of the phases of a request.", ("phase",))
+)
+
+
+class phase_timer:
+    """
+    Time a phase of a request, e.g. jwt, cognito, db or serialization.
+
+    Use as a context manager, or as a decorator of sync or async functions.
+    """
+
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        phase_duration.observe(time.perf_counter() - self.start, self.phase)
+
+    def __call__(self, func: Callable) -> Callable:
+        phase = self.phase
+
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with phase_timer(phase):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase_timer(phase):
+                return func(*args, **kwargs)
+
+        return wrapper
@@ -1,6 +1,6 @@
 from typing import Optional
 from typing import List
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy import String, Integer, Boolean, Float, ARRAY, Text
 from datetime import datetime, timezone
 import uuid
@@ -9,6 +9,14 @@ from db.database import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Task list of a user, ordered by creation date (keyset pagination)
+        Index("ix_tasks_user_created", "user_id", "created_at", "id"),
+        # Status and deadline filters
+        Index("ix_tasks_user_status_deadline", "user_id", "status", "deadline"),
+        # Priority range filter
+        Index("ix_tasks_user_priority", "user_id", "priority"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
@@ -18,3 +26,5 @@ class Task(Base):
     priority = Column(Integer, nullable=False)
     deadline = Column(DateTime(timezone=True), nullable=False)
     status = Column(String(500), default="Todo", nullable=False)
+    # Incremented on every update, the ETag of the task
+    version = Column(Integer, default=1, server_default="1", nullable=False)
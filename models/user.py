@@ -1,7 +1,7 @@
 import datetime
 
 from fastapi import Depends
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime
 from sqlalchemy.orm import Session
 
 from db.database import Base, get_db
@@ -22,6 +22,8 @@ class User(Base):
         default=datetime.datetime.now(),
         nullable=False,
     )
+    # Incremented on every write to the user's tasks, the ETag of the task list
+    tasks_version = Column(Integer, default=0, server_default="0", nullable=False)
 
 
 def save_user(new_user: UserCreate, db: Session = Depends(get_db)):
@@ -1,21 +1,181 @@
+import hashlib
 import logging
-from typing import List
-from crud.task import delete_task_by_id, get_task_by_id, get_task_by_user_id, update_task_by_id
-from fastapi import APIRouter, HTTPException, Depends, status
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import urlencode
+from crud.async_task import create_task, create_tasks, delete_task_by_id, delete_tasks, get_task_by_id, get_tasks_page, get_tasks_version, update_task_by_id, update_tasks
+from crud.task import iter_task_rows_by_user_id, task_list_cache
+from fastapi import APIRouter, Body, HTTPException, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from sqlalchemy.orm import Session
 
-from db.database import get_db
+from db.async_database import get_session
 
-from crud.user import get_user_by_id, get_user_by_username, create_user
-from crud.task import create_task
-from schemas.task import TaskCreate, TaskInDB, TaskUpdate
-from auth.auth import jwks, get_current_user
-from auth.JWTBearer import JWTBearer
+from crud import async_task
+from metrics.prometheus import phase_timer
+from schemas.encoding import dumps, rows_to_dicts
+from schemas.task import TaskBulkDelete, TaskBulkResult, TaskBulkUpdate, TaskCreate, TaskInDB, TaskUpdate
+from schemas.user import UserInDB
+from auth.auth import auth, get_current_user_record
 
 router = APIRouter(prefix="/api",tags=["Tasks"])
 
-auth = JWTBearer(jwks)
+# Maximum number of tasks in a bulk request
+MAX_BULK_SIZE = 1000
 
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+# Fields of a task in responses
+TASK_FIELDS = tuple(TaskInDB.model_fields)
+
+
+def stream_tasks_export(user_id: str, bind: Engine, export_format: str, batch_size: int = 1000):
+    """
+    Generator that serializes all tasks of a user, batch_size tasks per chunk.
+
+    The request session is closed before a streaming response is sent, so the
+    tasks are read with a session of their own on the same bind.
+
+    :param user_id: ID of the user.
+    :param bind: Engine of the request session.
+    :param export_format: "ndjson" for one task per line, "json" for a JSON array.
+    :param batch_size: Number of tasks per chunk.
+    :return: Iterator of chunks.
+    """
+
+    chunk = []
+    first_chunk = True
+
+    with Session(bind=bind) as db:
+        for row in iter_task_rows_by_user_id(user_id, db, batch_size=batch_size):
+            chunk.append(row)
+            if len(chunk) == batch_size:
+                yield export_chunk(chunk, export_format, first_chunk)
+                chunk = []
+                first_chunk = False
+
+    yield export_chunk(chunk, export_format, first_chunk)
+    if export_format == "json":
+        yield b"]"
+
+
+async def stream_tasks_export_async(
+    user_id: str, bind: AsyncEngine, export_format: str, batch_size: int = 1000
+):
+    """
+    Async generator version of stream_tasks_export, for the async engine.
+
+    :param user_id: ID of the user.
+    :param bind: Async engine of the request session.
+    :param export_format: "ndjson" for one task per line, "json" for a JSON array.
+    :param batch_size: Number of tasks per chunk.
+    :return: Async iterator of chunks.
+    """
+
+    chunk = []
+    first_chunk = True
+
+    async with AsyncSession(bind=bind) as db:
+        async for row in async_task.iter_task_rows_by_user_id(user_id, db, batch_size=batch_size):
+            chunk.append(row)
+            if len(chunk) == batch_size:
+                yield export_chunk(chunk, export_format, first_chunk)
+                chunk = []
+                first_chunk = False
+
+    yield export_chunk(chunk, export_format, first_chunk)
+    if export_format == "json":
+        yield b"]"
+
+
+@phase_timer("serialization")
+def export_chunk(rows: list, export_format: str, first_chunk: bool) -> bytes:
+    """
+    Function that serializes task rows into a chunk of the export.
+
+    :param rows: Task rows.
+    :param export_format: "ndjson" or "json".
+    :param first_chunk: Whether this is the first chunk of the export.
+    :return: Chunk of the export.
+    """
+
+    tasks = rows_to_dicts(rows, TASK_FIELDS)
+    if export_format == "ndjson":
+        return b"".join(dumps(task) + b"\n" for task in tasks)
+    # The tasks of the array, without its brackets
+    body = dumps(tasks)[1:-1]
+    if first_chunk:
+        return b"[" + body
+    return b"," + body if rows else b""
+
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """
+    Function that checks an If-None-Match or If-Match header against an ETag.
+
+    :param header: Value of the header, None when it was not sent.
+    :param etag: Current ETag of the resource.
+    :param weak: Whether weak ETags match too, True for If-None-Match, False for If-Match.
+    :return: True if one of the ETags of the header matches.
+    """
+
+    if header is None:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def task_list_etag(user_id: str, params: str, tasks_version: int) -> str:
+    """
+    Function that builds the ETag of a task list from the tasks version of the user.
+
+    :param user_id: ID of the user.
+    :param params: Normalized query parameters of the list.
+    :param tasks_version: Tasks version of the user.
+    :return: Strong ETag.
+    """
+
+    digest = hashlib.sha256(f"{user_id}?{params}".encode()).hexdigest()[:16]
+    return f'"{digest}-{tasks_version}"'
+
+def task_etag(task) -> str:
+    """
+    Function that builds the ETag of a task from its version.
+
+    :param task: Task, as an ORM object or a row.
+    :return: Strong ETag.
+    """
+
+    return f'"{task.id}-{task.version}"'
+
+def if_match_version(header: str, task_id: str) -> Optional[int]:
+    """
+    Function that gets the version a task must be at from an If-Match header.
+
+    :param header: Value of the If-Match header.
+    :param task_id: ID of the task.
+    :return: Version of the first ETag of the task, None for "*".
+    :raises HTTPException: 412 if no ETag of the header belongs to the task.
+    """
+
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return None
+        etag_task_id, _, version = candidate.strip('"').rpartition("-")
+        if not candidate.startswith("W/") and etag_task_id == task_id and version.isdigit():
+            return int(version)
+    raise HTTPException(status_code=412, detail="Task was modified.")
 
 @router.post(
     "/tasks",
@@ -25,74 +185,246 @@ auth = JWTBearer(jwks)
 )
 async def create_new_task(
     task_data: TaskCreate,
-    user_username: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
 ):
     """
     Endpoint that creates a new task.
 
     :param task_data: Task data to be created.
-    :param user_username: Username of the user creating the task.
+    :param user: User creating the task.
     :param db: Database session.
     :return: Task created.
     """
 
-    user = get_user_by_username(user_username, db)
-    if user is None:
-        logging.error(f"User with username {user_username} not found.")
-        raise HTTPException(status_code=404, detail="User not found.")
-
-    return create_task(task=task_data, user_id=user.id, db=db)
+    return await create_task(task=task_data, user_id=user.id, db=db)
 
 @router.get("/tasks", response_model=List[TaskInDB], dependencies=[Depends(auth)])
-async def get_all_tasks(user_username: str = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_all_tasks(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    task_status: Optional[str] = Query(None, alias="status"),
+    priority_min: Optional[int] = None,
+    priority_max: Optional[int] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
     """
-    Endpoint that retrieves all tasks from a user.
+    Endpoint that retrieves the tasks from a user, optionally filtered and paginated.
 
-    :param user_username: Username of the user to retrieve tasks.
+    When there are more tasks, the cursor of the next page is returned in the
+    X-Next-Cursor header. Responses are cached per user and query until the
+    user's tasks change. The ETag follows the tasks version of the user, a
+    matching If-None-Match gets a 304 without reading the tasks.
+
+    :param limit: Maximum number of tasks, all tasks when omitted.
+    :param cursor: Cursor of the page, from the X-Next-Cursor header of the previous one.
+    :param task_status: Only tasks with this status.
+    :param priority_min: Only tasks with at least this priority.
+    :param priority_max: Only tasks with at most this priority.
+    :param deadline_from: Only tasks with a deadline at or after this date.
+    :param deadline_to: Only tasks with a deadline at or before this date.
+    :param user: User to retrieve tasks.
     :param db: Database session.
     :return: List of tasks.
     """
 
-    user = get_user_by_username(user_username, db)
-    if user is None:
-        logging.error(f"User with username {user_username} not found.")
-        raise HTTPException(status_code=404, detail="User not found.")
+    params = urlencode(sorted(request.query_params.multi_items()))
+    if_none_match = request.headers.get("If-None-Match")
+    cache_key, cached = task_list_cache.lookup(user.id, params)
+    if cached is not None:
+        body, headers = cached
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": headers["ETag"]})
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    # The version is read before the tasks, so a write in between only makes the ETag stale
+    etag = task_list_etag(user.id, params, await get_tasks_version(user.id, db))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    try:
+        tasks, next_cursor = await get_tasks_page(
+            user_id=user.id,
+            db=db,
+            limit=limit,
+            cursor=cursor,
+            status=task_status,
+            priority_min=priority_min,
+            priority_max=priority_max,
+            deadline_from=deadline_from,
+            deadline_to=deadline_to,
+            as_rows=True,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    with phase_timer("serialization"):
+        body = dumps(rows_to_dicts(tasks, TASK_FIELDS))
+    task_list_cache.store(cache_key, body, headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/tasks/export", dependencies=[Depends(auth)])
+async def export_tasks(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|json)$"),
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
+    """
+    Endpoint that streams all tasks from a user, for backups and sync clients.
+
+    :param export_format: "ndjson" for one task per line, "json" for a JSON array.
+    :param user: User to export tasks.
+    :param db: Database session.
+    :return: Streaming response with the tasks.
+    """
+
+    if isinstance(db, AsyncSession):
+        chunks = stream_tasks_export_async(user.id, db.bind, export_format)
+    else:
+        chunks = stream_tasks_export(user.id, db.get_bind(), export_format)
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[export_format])
+
+@router.post("/tasks/bulk", response_model=List[TaskBulkResult], dependencies=[Depends(auth)])
+async def create_tasks_bulk(
+    tasks_data: List[TaskCreate] = Body(..., max_length=MAX_BULK_SIZE),
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
+    """
+    Endpoint that creates many tasks in one transaction.
+
+    :param tasks_data: Tasks data to be created.
+    :param user: User creating the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    return await create_tasks(tasks=tasks_data, user_id=user.id, db=db)
+
+@router.patch("/tasks/bulk", response_model=List[TaskBulkResult], dependencies=[Depends(auth)])
+async def update_tasks_bulk(
+    tasks_data: List[TaskBulkUpdate] = Body(..., max_length=MAX_BULK_SIZE),
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
+    """
+    Endpoint that updates many tasks in one transaction. Only the fields sent are changed.
+
+    :param tasks_data: Tasks data to be updated, each with the ID of the task.
+    :param user: User updating the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    return await update_tasks(tasks=tasks_data, user_id=user.id, db=db)
+
+@router.delete("/tasks/bulk", response_model=List[TaskBulkResult], dependencies=[Depends(auth)])
+async def delete_tasks_bulk(
+    tasks_data: TaskBulkDelete,
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
+    """
+    Endpoint that deletes many tasks in one statement.
+
+    :param tasks_data: IDs of the tasks to be deleted.
+    :param user: User deleting the tasks.
+    :param db: Database session.
+    :return: Result of each task, in the order received.
+    """
+
+    if len(tasks_data.ids) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BULK_SIZE} tasks per request.")
+
+    return await delete_tasks(task_ids=tasks_data.ids, user_id=user.id, db=db)
+
+@router.get("/tasks/{task_id}", response_model=TaskInDB, dependencies=[Depends(auth)])
+async def get_task(
+    task_id: str,
+    request: Request,
+    response: Response,
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
+    """
+    Endpoint that retrieves a task by its ID, with its version as ETag.
+
+    :param task_id: ID of the task.
+    :param user: User owning the task.
+    :param db: Database session.
+    :return: Task retrieved, or 304 if it matches If-None-Match.
+    """
+
+    task = await get_task_by_id(task_id, db, user_id=user.id)
+    if task is None:
+        logging.error(f"Task with ID {task_id} not found.")
+        raise HTTPException(status_code=404, detail="Task not found.")
+
+    etag = task_etag(task)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-    tasks = get_task_by_user_id(user_id = user.id, db = db)
-    return tasks
+    response.headers["ETag"] = etag
+    return task
 
 @router.delete("/tasks/{task_id}", dependencies=[Depends(auth)])
-async def delete_task(task_id: str, db: Session = Depends(get_db)):
+async def delete_task(
+    task_id: str,
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
     """
     Endpoint that deletes a task by its ID.
 
     :param task_id: ID of the task to be deleted.
+    :param user: User owning the task.
     :param db: Database session.
-    :return: Task deleted.
+    :return: ID of the task deleted.
     """
 
-    task = get_task_by_id(task_id, db)
-    if task is None:
+    if not await delete_task_by_id(task_id, db, user_id=user.id):
         logging.error(f"Task with ID {task_id} not found.")
         raise HTTPException(status_code=404, detail="Task not found.")
 
-    return delete_task_by_id(task_id, db)
+    return {"id": task_id}
 
 @router.put("/tasks/{task_id}", response_model=TaskInDB, dependencies=[Depends(auth)])
-async def update_task(task_id: str, task_data: TaskUpdate, db: Session = Depends(get_db)):
+async def update_task(
+    task_id: str,
+    task_data: TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    user: UserInDB = Depends(get_current_user_record),
+    db: Session = Depends(get_session),
+):
     """
-    Endpoint that updates a task by its ID.
+    Endpoint that updates a task by its ID. Only the fields sent are changed.
+
+    With If-Match, the task is only updated if its ETag still matches, so
+    concurrent edits are not lost.
 
     :param task_id: ID of the task to be updated.
     :param task_data: Task data to be updated.
+    :param if_match: ETag the task must still have.
+    :param user: User owning the task.
     :param db: Database session.
     :return: Task updated.
     """
 
-    task = get_task_by_id(task_id, db)
+    version = if_match_version(if_match, task_id) if if_match is not None else None
+    task = await update_task_by_id(task_id=task_id, task=task_data, db=db, user_id=user.id, version=version)
     if task is None:
+        if version is not None and await get_task_by_id(task_id, db, user_id=user.id) is not None:
+            raise HTTPException(status_code=412, detail="Task was modified.")
         logging.error(f"Task with ID {task_id} not found.")
         raise HTTPException(status_code=404, detail="Task not found.")
 
-    return update_task_by_id(task_id=task_id, task=task_data, db=db)
\ No newline at end of file
+    response.headers["ETag"] = task_etag(task)
+    return task
@@ -3,30 +3,31 @@ import logging
 
 from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.encoders import jsonable_encoder
-from starlette.responses import JSONResponse
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException
-from db.database import get_db
+from db.async_database import get_session
+from db.routing import set_session_user
 
-from auth.JWTBearer import JWTAuthorizationCredentials, JWTBearer
-from auth.auth import jwks, get_current_user
-from auth.user_auth import auth_with_code, user_info_with_token, logout_with_token
+from auth.JWTBearer import JWTAuthorizationCredentials
+from auth.auth import auth, get_current_user
+from auth.async_user_auth import auth_with_code, user_info_with_token, logout_with_token
 from models.user import User, save_user
-from crud.user import get_user_by_id, get_user_by_username, get_user_by_email, create_user
+from crud.async_user import get_user_by_id, get_user_by_username, get_user_by_email, create_user
+from schemas.encoding import FastJSONResponse, rows_to_dicts
 from schemas.user import UserCreate
 
 load_dotenv()
 
 router = APIRouter(prefix="/api", tags=["Authentication and Authorization"])
 
-auth = JWTBearer(jwks)
-
 REDIRECT_URI = os.environ.get("REDIRECT_URI")
 
+# Fields of the current user in responses
+USER_FIELDS = ("id", "given_name", "family_name", "username", "email", "updated_at")
+
 
 @router.post("/auth/sign-in")
-async def login(code: str, db: Session = Depends(get_db)):
+async def login(code: str, db: Session = Depends(get_session)):
     """
     Function that logs in a user.
 
@@ -36,12 +37,12 @@ async def login(code: str, db: Session = Depends(get_db)):
     """
 
     # Authenticate user with the code
-    token = auth_with_code(code, REDIRECT_URI)
+    token = await auth_with_code(code, REDIRECT_URI)
     if token is None:
         raise HTTPException(status_code=401, detail="Error loging in...")
     else:
         # Get user info from the token
-        user_info = user_info_with_token(token.get("token"))
+        user_info = await user_info_with_token(token.get("token"))
 
         new_user = UserCreate(
             id=user_info["UserAttributes"][4]["Value"],
@@ -53,22 +54,23 @@ async def login(code: str, db: Session = Depends(get_db)):
 
         # If the user does not exist, save it
         print("new user", new_user)
+        set_session_user(db, new_user.id)
         # Check if the user already exists
-        existing_user = get_user_by_username(
+        existing_user = await get_user_by_username(
             new_user.username, db
-        ) or get_user_by_email(new_user.email, db)
+        ) or await get_user_by_email(new_user.email, db)
 
         if not existing_user:
-            create_user(new_user, db)
+            await create_user(new_user, db)
         else:
             logging.info(f"User '{new_user.username}' already exists in the database.")
 
-        return JSONResponse(status_code=200, content=jsonable_encoder(token))
+        return FastJSONResponse(status_code=200, content=token)
 
 
 @router.get("/auth/me", dependencies=[Depends(auth)])
 async def current_user(
-    username: str = Depends(get_current_user), db: Session = Depends(get_db)
+    username: str = Depends(get_current_user), db: Session = Depends(get_session)
 ):
     """
     Function that returns the current user.
@@ -78,9 +80,10 @@ async def current_user(
     :return: User object if found, otherwise raise an HTTPException
     """
     
-    return JSONResponse(
+    user = await get_user_by_username(user_username=username, db=db)
+    return FastJSONResponse(
         status_code=200,
-        content=jsonable_encoder(get_user_by_username(user_username=username, db=db)),
+        content=rows_to_dicts([user], USER_FIELDS)[0] if user is not None else None,
     )
 
 
@@ -93,8 +96,10 @@ async def logout(credentials: JWTAuthorizationCredentials = Depends(auth)):
     :return: Message if logout is successful, otherwise raise an HTTPException.
     """
 
-    result = logout_with_token(credentials.jwt_token)
+    result = await logout_with_token(credentials.jwt_token)
     if result:
-        return JSONResponse(status_code=200, content="Logout successful")
+        # The token is revoked, so it must not be served from the cache anymore
+        auth.invalidate_token(credentials.jwt_token)
+        return FastJSONResponse(status_code=200, content="Logout successful")
     else:
         raise HTTPException(status_code=401, detail="Error loging out...")
\ No newline at end of file
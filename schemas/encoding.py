@@ -0,0 +1,59 @@
+import json
+from datetime import date, datetime, timedelta
+from operator import attrgetter
+from typing import Any, Iterable, List, Sequence
+
+from starlette.responses import JSONResponse
+
+from metrics.prometheus import phase_timer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    # Same output as orjson for the types of the models
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if value.utcoffset() == timedelta(0) else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode to compact JSON, with orjson when it is installed.
+
+    :param content: Dicts, lists, strings, numbers, None and datetimes.
+    :return: JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def rows_to_dicts(rows: Iterable[Any], fields: Sequence[str]) -> List[dict]:
+    """
+    Pick fields from rows, without validation.
+
+    :param rows: Result rows or ORM objects, read by attribute.
+    :param fields: Fields to pick, in output order.
+    :return: One dict per row.
+    """
+    if len(fields) == 1:
+        return [{fields[0]: getattr(row, fields[0])} for row in rows]
+    getter = attrgetter(*fields)
+    return [dict(zip(fields, getter(row))) for row in rows]
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with dumps. The content is not run through jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with phase_timer("serialization"):
+            return dumps(content)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class TaskBase(BaseModel):
@@ -12,14 +12,31 @@ class TaskCreate(TaskBase):
     pass
 
 class TaskUpdate(TaskBase):
-    title: Optional[str]
-    description: Optional[str]
-    priority: Optional[int]
-    deadline: Optional[datetime]
-    status: Optional[str]
+    title: Optional[str] = None
+    description: Optional[str] = None
+    priority: Optional[int] = None
+    deadline: Optional[datetime] = None
+    status: Optional[str] = None
     
 
 class TaskInDB(TaskBase):
     id: str
     status: str
     created_at: datetime
+
+class TaskBulkUpdate(BaseModel):
+    id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    priority: Optional[int] = None
+    deadline: Optional[datetime] = None
+    status: Optional[str] = None
+
+class TaskBulkDelete(BaseModel):
+    ids: List[str]
+
+class TaskBulkResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str
+    detail: Optional[str] = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class UserCreate(BaseModel):
@@ -6,4 +6,7 @@ class UserCreate(BaseModel):
     given_name: str
     family_name: str
     username: str
-    email: str
\ No newline at end of file
+    email: str
+
+class UserInDB(UserCreate):
+    model_config = ConfigDict(from_attributes=True)
@@ -8,8 +8,8 @@ from db.database import get_db
 from main import app
 from models.task import Task as TaskModel
 from models.user import User as UserModel
-from schemas.task import TaskCreate, TaskUpdate
-from crud.task import create_task, get_task_by_id, get_task_by_user_id, delete_task_by_id, update_task_by_id
+from schemas.task import TaskBulkUpdate, TaskCreate, TaskInDB, TaskUpdate
+from crud.task import create_task, create_tasks, get_task_by_id, get_task_by_user_id, get_tasks_page, get_tasks_version, delete_task_by_id, delete_tasks, task_list_cache, TaskRow, update_task_by_id, update_tasks
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -158,10 +158,226 @@ def test_delete_task_by_id(test_db, test_user):
     )
     created_task = create_task(task_data, test_user.id, test_db)
 
-    deleted_task = delete_task_by_id(created_task.id, test_db)
-
-    assert deleted_task is not None
-    assert deleted_task.id == created_task.id
+    assert delete_task_by_id(created_task.id, test_db) is True
 
     found_task = get_task_by_id(created_task.id, test_db)
-    assert found_task is None
\ No newline at end of file
+    assert found_task is None
+
+def create_test_tasks(test_db, test_user, count):
+    return [
+        create_task(
+            TaskCreate(
+                title=f"Test Task {i}",
+                description="This is a test task",
+                priority=i,
+                deadline=datetime.now(timezone.utc) + timedelta(days=i + 1),
+            ),
+            test_user.id,
+            test_db,
+        )
+        for i in range(count)
+    ]
+
+
+def test_get_tasks_page(test_db, test_user):
+    create_test_tasks(test_db, test_user, 5)
+    all_tasks = get_task_by_user_id(test_user.id, test_db)
+
+    first_page, first_cursor = get_tasks_page(test_user.id, test_db, limit=2)
+    second_page, second_cursor = get_tasks_page(test_user.id, test_db, limit=2, cursor=first_cursor)
+    last_page, last_cursor = get_tasks_page(test_user.id, test_db, limit=10, cursor=second_cursor)
+
+    assert len(first_page) == 2
+    assert len(second_page) == 2
+    assert last_cursor is None
+    assert {task.id for task in first_page + second_page + last_page} == {task.id for task in all_tasks}
+
+
+def test_get_tasks_page_filters(test_db, test_user):
+    tasks = create_test_tasks(test_db, test_user, 5)
+    update_task_by_id(
+        tasks[0].id,
+        TaskUpdate(
+            title="Done Task",
+            description="This is a done task",
+            priority=0,
+            deadline=tasks[0].deadline,
+            status="Done",
+        ),
+        test_db,
+    )
+
+    done_tasks, _ = get_tasks_page(test_user.id, test_db, status="Done")
+    priority_tasks, _ = get_tasks_page(test_user.id, test_db, priority_min=1, priority_max=2)
+    deadline_tasks, _ = get_tasks_page(
+        test_user.id,
+        test_db,
+        deadline_to=datetime.now(timezone.utc) + timedelta(days=2, hours=1),
+    )
+
+    assert [task.id for task in done_tasks] == [tasks[0].id]
+    assert {task.id for task in priority_tasks} == {tasks[1].id, tasks[2].id}
+    assert {task.id for task in deadline_tasks} == {tasks[0].id, tasks[1].id}
+
+
+def test_get_tasks_page_invalid_cursor(test_db, test_user):
+    with pytest.raises(ValueError):
+        get_tasks_page(test_user.id, test_db, limit=2, cursor="invalid")
+
+
+def test_create_tasks(test_db, test_user):
+    tasks_data = [
+        TaskCreate(
+            title=f"Bulk Task {i}",
+            description="This is a bulk task",
+            priority=i,
+            deadline=datetime.now(timezone.utc) + timedelta(days=1),
+        )
+        for i in range(3)
+    ]
+
+    results = create_tasks(tasks_data, test_user.id, test_db)
+
+    assert [result.status for result in results] == ["created"] * 3
+    for result in results:
+        assert get_task_by_id(result.id, test_db).user_id == test_user.id
+
+
+def test_create_tasks_listed_in_order_received(test_db, test_user):
+    deadline = datetime.now(timezone.utc) + timedelta(days=1)
+    titles = [f"Imported Task {i}" for i in range(50)]
+
+    create_tasks(
+        [TaskCreate(title=title, description="Imported", priority=1, deadline=deadline) for title in titles],
+        test_user.id,
+        test_db,
+    )
+    first_page, cursor = get_tasks_page(test_user.id, test_db, limit=20)
+    rest, _ = get_tasks_page(test_user.id, test_db, cursor=cursor)
+
+    assert [task.title for task in first_page + rest] == titles
+
+
+def test_update_tasks(test_db, test_user):
+    tasks = create_test_tasks(test_db, test_user, 2)
+
+    results = update_tasks(
+        [
+            TaskBulkUpdate(id=tasks[0].id, status="Done"),
+            TaskBulkUpdate(id="not_exist", status="Done"),
+        ],
+        test_user.id,
+        test_db,
+    )
+
+    assert [result.status for result in results] == ["updated", "not_found"]
+    test_db.expire_all()
+    assert get_task_by_id(tasks[0].id, test_db).status == "Done"
+    assert get_task_by_id(tasks[0].id, test_db).title == tasks[0].title
+
+
+def test_delete_tasks(test_db, test_user):
+    tasks = create_test_tasks(test_db, test_user, 2)
+
+    results = delete_tasks([tasks[0].id, "not_exist"], test_user.id, test_db)
+
+    assert [result.status for result in results] == ["deleted", "not_found"]
+    assert get_task_by_id(tasks[0].id, test_db) is None
+    assert get_task_by_id(tasks[1].id, test_db) is not None
+
+
+def test_delete_task_by_id_not_found(test_db, test_user):
+    assert delete_task_by_id("not_exist", test_db) is False
+
+
+def test_delete_task_by_id_other_user(test_db, test_user):
+    created_task = create_test_tasks(test_db, test_user, 1)[0]
+
+    assert delete_task_by_id(created_task.id, test_db, user_id="other_user_id") is False
+    assert get_task_by_id(created_task.id, test_db) is not None
+
+
+def test_update_task_by_id_partial(test_db, test_user):
+    created_task = create_test_tasks(test_db, test_user, 1)[0]
+
+    updated_task = update_task_by_id(created_task.id, TaskUpdate(status="Done"), test_db, user_id=test_user.id)
+
+    assert updated_task.status == "Done"
+    assert updated_task.title == created_task.title
+    assert updated_task.priority == created_task.priority
+
+
+def test_update_task_by_id_other_user(test_db, test_user):
+    created_task = create_test_tasks(test_db, test_user, 1)[0]
+
+    updated_task = update_task_by_id(created_task.id, TaskUpdate(status="Done"), test_db, user_id="other_user_id")
+
+    assert updated_task is None
+    test_db.expire_all()
+    assert get_task_by_id(created_task.id, test_db).status == "Todo"
+
+def test_writes_invalidate_task_list_cache(test_db, test_user):
+    key, _ = task_list_cache.lookup(test_user.id, "")
+    task_list_cache.store(key, b"[]")
+
+    created_task = create_task(
+        TaskCreate(title="Task", description="description", priority=1, deadline=datetime.now(timezone.utc) + timedelta(days=1)),
+        test_user.id,
+        test_db,
+    )
+    assert task_list_cache.lookup(test_user.id, "")[1] is None
+
+    key, _ = task_list_cache.lookup(test_user.id, "")
+    task_list_cache.store(key, b"[]")
+    # Without a user, the owner of the task is invalidated
+    assert delete_task_by_id(created_task.id, test_db) is True
+    assert task_list_cache.lookup(test_user.id, "")[1] is None
+
+def test_update_task_by_id_version(test_db, test_user):
+    created_task = create_task(
+        TaskCreate(title="Task", description="description", priority=1, deadline=datetime.now(timezone.utc) + timedelta(days=1)),
+        test_user.id,
+        test_db,
+    )
+    tasks_version = get_tasks_version(test_user.id, test_db)
+
+    updated_task = update_task_by_id(created_task.id, TaskUpdate(title="Updated"), test_db, user_id=test_user.id, version=1)
+    assert updated_task.version == 2
+    assert get_tasks_version(test_user.id, test_db) == tasks_version + 1
+
+    # The task is no longer at version 1
+    assert update_task_by_id(created_task.id, TaskUpdate(title="Again"), test_db, user_id=test_user.id, version=1) is None
+
+def test_get_task_by_id_other_user(test_db, test_user):
+    created_task = create_task(
+        TaskCreate(title="Task", description="description", priority=1, deadline=datetime.now(timezone.utc) + timedelta(days=1)),
+        test_user.id,
+        test_db,
+    )
+
+    assert get_task_by_id(created_task.id, test_db, user_id=test_user.id).id == created_task.id
+    assert get_task_by_id(created_task.id, test_db, user_id="other_user_id") is None
+
+def test_get_tasks_page_as_rows(test_db, test_user):
+    create_test_tasks(test_db, test_user, 3)
+    user_id = test_user.id
+    test_db.expunge_all()
+
+    first_page, cursor = get_tasks_page(user_id, test_db, limit=2, as_rows=True)
+    last_page, _ = get_tasks_page(user_id, test_db, limit=2, cursor=cursor, as_rows=True)
+    tasks, _ = get_tasks_page(user_id, test_db)
+
+    assert all(isinstance(task, TaskRow) for task in first_page + last_page)
+    assert [task.id for task in first_page + last_page] == [task.id for task in tasks]
+    assert TaskRow._fields == tuple(TaskInDB.model_fields)
+    assert len(test_db.identity_map) == len(tasks)
+
+def test_get_task_by_user_id_as_rows(test_db, test_user):
+    create_test_tasks(test_db, test_user, 2)
+    user_id = test_user.id
+    test_db.expunge_all()
+
+    tasks = get_task_by_user_id(user_id, test_db, as_rows=True)
+
+    assert [task.title for task in tasks] == ["Test Task 0", "Test Task 1"]
+    assert len(test_db.identity_map) == 0
@@ -7,8 +7,8 @@ from testcontainers.mysql import MySqlContainer
 from db.database import get_db
 from main import app
 from models.user import User as UserModel
-from schemas.user import UserCreate
-from crud.user import create_user, get_user_by_username, get_user_by_email
+from schemas.user import UserCreate, UserInDB
+from crud.user import create_user, get_user_by_username, get_user_by_email, get_cached_user_by_username, user_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -114,3 +114,59 @@ def test_get_user_by_email_not_found(test_db):
         "not_exist@email.com", test_db
     )
     assert found_user is None
+
+
+def test_get_cached_user_by_username(test_db, test_user):
+    user_cache.clear()
+
+    first = get_cached_user_by_username(test_user.username, test_db)
+    second = get_cached_user_by_username(test_user.username, test_db)
+
+    assert first.id == test_user.id
+    assert second is first
+    assert user_cache.hits == 1
+
+
+def test_user_cache_invalidated_on_update(test_db, test_user):
+    user_cache.clear()
+    get_cached_user_by_username(test_user.username, test_db)
+
+    test_user.given_name = "updated_given_name"
+    test_db.commit()
+
+    found_user = get_cached_user_by_username(test_user.username, test_db)
+    assert found_user.given_name == "updated_given_name"
+
+
+def test_user_cache_invalidated_after_commit(test_db, test_user):
+    user_cache.clear()
+
+    test_user.given_name = "updated_given_name"
+    test_db.flush()
+    # A concurrent request caches the committed row while the update is not committed yet
+    old_user = UserInDB.model_validate(test_user).model_copy(update={"given_name": "given_name"})
+    user_cache.set(test_user.username, old_user)
+    test_db.commit()
+
+    found_user = get_cached_user_by_username(test_user.username, test_db)
+    assert found_user.given_name == "updated_given_name"
+
+
+def test_user_cache_invalidated_on_delete(test_db):
+    user_cache.clear()
+    user = create_user(
+        UserCreate(
+            id="id3",
+            given_name="given_name3",
+            family_name="family_name3",
+            username="username3",
+            email="email3",
+        ),
+        test_db,
+    )
+    get_cached_user_by_username(user.username, test_db)
+
+    test_db.delete(user)
+    test_db.commit()
+
+    assert get_cached_user_by_username("username3", test_db) is None
@@ -0,0 +1,137 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from crud.task import create_task, get_task_by_id, get_tasks_page
+from db.migrations import apply_migrations
+from models.task import Task as TaskModel
+from models.user import User as UserModel
+from schemas.task import TaskCreate
+
+task_indexes = {"ix_tasks_user_created", "ix_tasks_user_status_deadline", "ix_tasks_user_priority"}
+
+
+@pytest.fixture(name="engine")
+def setup():
+    # SQLite stand-in for MySQL, the plans are checked with EXPLAIN QUERY PLAN
+    engine = create_engine("sqlite://")
+    UserModel.metadata.create_all(engine)
+    TaskModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="test_db")
+def create_test_db(engine):
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.add(
+        UserModel(
+            id="test_user_id",
+            given_name="Test",
+            family_name="User",
+            username="testuser",
+            email="testuser@example.com",
+        )
+    )
+    for i in range(20):
+        create_task(
+            TaskCreate(
+                title=f"Test Task {i}",
+                description="This is a test task",
+                priority=i % 5,
+                deadline=datetime.now(timezone.utc) + timedelta(days=i + 1),
+            ),
+            "test_user_id",
+            db,
+        )
+    yield db
+    db.close()
+
+
+def query_plans(engine, func):
+    """
+    Run func and return the EXPLAIN QUERY PLAN of every SELECT it executed.
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        return [
+            " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            for statement, parameters in statements
+        ]
+
+
+def test_apply_migrations_creates_missing_indexes(engine):
+    with engine.begin() as conn:
+        for index in task_indexes:
+            conn.execute(text(f"DROP INDEX {index}"))
+
+    apply_migrations(engine)
+    apply_migrations(engine)
+
+    assert task_indexes <= {index["name"] for index in inspect(engine).get_indexes("tasks")}
+
+
+def test_apply_migrations_adds_missing_columns(engine, test_db):
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE user DROP COLUMN tasks_version"))
+        conn.execute(text("ALTER TABLE tasks DROP COLUMN version"))
+
+    apply_migrations(engine)
+    apply_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT tasks_version FROM user")).scalar_one() == 0
+        assert set(conn.execute(text("SELECT version FROM tasks")).scalars()) == {1}
+
+
+def test_task_list_uses_created_index(engine, test_db):
+    _, cursor = get_tasks_page("test_user_id", test_db, limit=5)
+
+    plans = query_plans(engine, lambda: get_tasks_page("test_user_id", test_db, limit=5, cursor=cursor))
+
+    assert "ix_tasks_user_created" in plans[0]
+    assert "TEMP B-TREE" not in plans[0]
+
+
+def test_status_and_deadline_filter_uses_index(engine, test_db):
+    plans = query_plans(
+        engine,
+        lambda: get_tasks_page(
+            "test_user_id",
+            test_db,
+            status="Done",
+            deadline_to=datetime.now(timezone.utc) + timedelta(days=3),
+        ),
+    )
+
+    assert "ix_tasks_user_status_deadline" in plans[0]
+
+
+def test_priority_filter_uses_index(engine, test_db):
+    plans = query_plans(
+        engine,
+        lambda: get_tasks_page("test_user_id", test_db, priority_min=3, priority_max=4),
+    )
+
+    assert "ix_tasks_user_priority" in plans[0]
+
+
+def test_task_by_id_and_owner_uses_primary_key(engine, test_db):
+    task_id = get_tasks_page("test_user_id", test_db, limit=1)[0][0].id
+
+    plans = query_plans(engine, lambda: get_task_by_id(task_id, test_db, user_id="test_user_id"))
+
+    assert "sqlite_autoindex_tasks_1 (id=?)" in plans[0]
+    assert get_task_by_id(task_id, test_db, user_id="other_user_id") is None
@@ -0,0 +1,53 @@
+import logging
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from crud.task import get_tasks_page
+from db.query_stats import count_queries, current_query_stats, listen_queries
+from models.task import Task
+from models.user import User
+
+
+def test_count_queries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Task.metadata.create_all(engine)
+
+    with Session(engine) as db, count_queries() as stats:
+        get_tasks_page("id1", db, limit=10)
+        db.execute(select(User)).all()
+
+    assert stats.count == 2
+    assert stats.duration > 0
+    assert "FROM tasks" in stats.statements[0]
+    assert current_query_stats.get() is None
+    engine.dispose()
+
+
+def test_slow_query_logged_with_plan(tmp_path, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Task.metadata.create_all(engine)
+    listen_queries(engine, slow_query_threshold=0)
+
+    with caplog.at_level(logging.WARNING), engine.connect() as conn:
+        conn.execute(select(Task.id).where(Task.user_id == "secret_user_id")).all()
+        conn.execute(text("UPDATE user SET given_name = 'name'"))
+
+    messages = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert len(messages) == 2
+    assert "FROM tasks" in messages[0] and "Plan: [" in messages[0]
+    assert "Parameters: ['str']" in messages[0] and "secret_user_id" not in messages[0]
+    assert "Plan: None" in messages[1]
+    engine.dispose()
+
+
+def test_slow_query_parameter_values_logged_when_enabled(tmp_path, caplog):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Task.metadata.create_all(engine)
+    listen_queries(engine, slow_query_threshold=0, explain_slow_queries=False, log_parameter_values=True)
+
+    with caplog.at_level(logging.WARNING), engine.connect() as conn:
+        conn.execute(select(Task.id).where(Task.user_id == "id1")).all()
+
+    assert "Parameters: ('id1',)" in caplog.records[-1].getMessage()
+    engine.dispose()
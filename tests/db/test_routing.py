@@ -0,0 +1,112 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from cache.ttl_cache import TTLCache
+from crud.task import create_task, get_task_by_user_id
+from crud.user import get_user_by_email, get_user_by_username
+from db.routing import ReplicaSet, RoutingSession, set_session_user
+from models.task import Task
+from models.user import User
+from schemas.task import TaskCreate
+
+
+def create_database(path, name):
+    engine = create_engine(f"sqlite:///{path}")
+    User.metadata.create_all(engine)
+    Task.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id="id1", given_name=name, family_name=name, username="username1", email="email1"))
+        db.commit()
+    return engine
+
+
+@pytest.fixture
+def databases(tmp_path):
+    primary = create_database(tmp_path / "primary.db", "primary")
+    replicas = [create_database(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(2)]
+    sticky_users = TTLCache(ttl=60)
+    session_factory = sessionmaker(
+        class_=RoutingSession,
+        bind=primary,
+        replicas=ReplicaSet(replicas),
+        sticky_users=sticky_users,
+    )
+    yield session_factory, sticky_users
+    for engine in [primary, *replicas]:
+        engine.dispose()
+
+
+def new_task():
+    return TaskCreate(
+        title="Task", description="description", priority=1, deadline=datetime.now(timezone.utc) + timedelta(days=1)
+    )
+
+
+def read_name(session_factory, user_id=None):
+    with session_factory() as db:
+        if user_id is not None:
+            set_session_user(db, user_id)
+        return get_user_by_username("username1", db).given_name
+
+
+def test_reads_round_robin_replicas(databases):
+    session_factory, _ = databases
+
+    names = [read_name(session_factory) for _ in range(4)]
+
+    assert names == ["replica0", "replica1", "replica0", "replica1"]
+
+
+def test_writes_go_to_primary(databases):
+    session_factory, _ = databases
+
+    with session_factory() as db:
+        create_task(new_task(), "id1", db)
+        # Reads after a write in the same session stay on the primary
+        assert len(get_task_by_user_id("id1", db)) == 1
+        assert get_user_by_email("email1", db).given_name == "primary"
+
+
+def test_user_sticks_to_primary_after_write(databases):
+    session_factory, sticky_users = databases
+
+    with session_factory() as db:
+        set_session_user(db, "id1")
+        create_task(new_task(), "id1", db)
+
+    assert read_name(session_factory, "id1") == "primary"
+    assert read_name(session_factory, "id2").startswith("replica")
+
+    sticky_users.clear()
+    assert read_name(session_factory, "id1").startswith("replica")
+
+
+def test_failover_when_replica_is_down(tmp_path, databases):
+    session_factory, _ = databases
+    missing = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+    replicas = ReplicaSet([missing])
+    session_factory.kw["replicas"] = replicas
+
+    assert read_name(session_factory) == "primary"
+    assert missing in replicas.down_until
+
+
+def test_failover_skips_down_replica(databases):
+    session_factory, _ = databases
+    replicas = session_factory.kw["replicas"]
+    replicas.mark_down(replicas.engines[0])
+
+    names = {read_name(session_factory) for _ in range(4)}
+
+    assert names == {"replica1"}
+
+
+def test_select_for_update_goes_to_primary(databases):
+    session_factory, _ = databases
+
+    with session_factory() as db:
+        user = db.scalars(select(User).with_for_update()).one()
+
+    assert user.given_name == "primary"
@@ -0,0 +1,679 @@
+import asyncio
+import json
+import tracemalloc
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from auth.auth import auth
+from auth.JWTBearer import JWTBearer
+from auth.jwks import JWKS, JWKSProvider
+from benchmarks.tokens import LocalSigner
+from crud.task import TaskRow, decode_cursor, task_list_cache
+from crud.user import user_cache
+from db.async_database import get_session
+from db.database import get_db
+from db.pool_metrics import InstrumentedQueuePool
+from db.query_stats import assert_max_queries
+from main import app
+from routers.task import MAX_BULK_SIZE, stream_tasks_export
+from models.task import Task as TaskModel
+from models.user import User as UserModel
+
+client = TestClient(app)
+
+signer = LocalSigner(kid="test_kid")
+jwks = JWKS.model_validate(signer.jwks())
+
+
+test_user = UserModel(
+    id="id1",
+    given_name="given_name1",
+    family_name="family_name1",
+    username="username1",
+    email="email1",
+)
+
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock(spec=Session)
+    app.dependency_overrides[get_db] = lambda: db
+    yield db
+    app.dependency_overrides = {}
+
+
+@pytest.fixture(autouse=True)
+def local_auth():
+    auth.token_cache.clear()
+    user_cache.clear()
+    task_list_cache.clear()
+    with patch.object(auth, "jwks", JWKSProvider(jwks=jwks)), patch(
+        "auth.JWTBearer.user_info_with_token"
+    ) as mock_user_info_with_token:
+        yield mock_user_info_with_token
+
+
+def test_get_all_tasks_verifies_token_once(local_auth, mock_db):
+    mock_db.query.return_value.filter.return_value.first.return_value = test_user
+    mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = []
+    token = signer.token()
+
+    with patch.object(
+        JWTBearer, "verify_jwk_token", autospec=True, side_effect=JWTBearer.verify_jwk_token
+    ) as mock_verify_jwk_token:
+        response = client.get("/api/tasks", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert mock_verify_jwk_token.call_count == 1
+    local_auth.assert_called_once_with(token)
+
+
+def test_get_all_tasks_without_token(mock_db):
+    response = client.get("/api/tasks")
+
+    assert response.status_code == 403
+    assert mock_db.query.call_count == 0
+
+
+def test_get_all_tasks_with_invalid_signature(mock_db):
+    header, payload, _ = signer.token().split(".")
+    forged_token = f"{header}.{payload}.{signer.token(username='other').split('.')[2]}"
+
+    response = client.get("/api/tasks", headers={"Authorization": f"Bearer {forged_token}"})
+
+    assert response.status_code == 403
+    assert mock_db.query.call_count == 0
+
+
+def test_get_all_tasks_caches_current_user(mock_db):
+    mock_db.query.return_value.filter.return_value.first.return_value = test_user
+    mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = []
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+
+    client.get("/api/tasks", headers=headers)
+    mock_db.reset_mock()
+    task_list_cache.clear()
+    response = client.get("/api/tasks", headers=headers)
+
+    assert response.status_code == 200
+    # Only the task query, the user comes from the cache
+    assert mock_db.query.call_count == 1
+
+
+def test_get_all_tasks_user_not_found(mock_db):
+    mock_db.query.return_value.filter.return_value.first.return_value = None
+
+    response = client.get("/api/tasks", headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "User not found."}
+
+
+def test_get_all_tasks_next_cursor(mock_db):
+    tasks = [
+        TaskRow(
+            id=f"task{i}",
+            title=f"Task {i}",
+            description="description",
+            priority=1,
+            status="Todo",
+            created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            deadline=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        )
+        for i in range(2)
+    ]
+    mock_db.query.return_value.filter.return_value.first.return_value = test_user
+    mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = tasks
+
+    response = client.get("/api/tasks?limit=1", headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == ["task0"]
+    assert decode_cursor(response.headers["X-Next-Cursor"])[1] == "task0"
+    mock_db.query.return_value.filter.return_value.order_by.return_value.limit.assert_called_once_with(2)
+
+
+def test_get_all_tasks_invalid_cursor(mock_db):
+    mock_db.query.return_value.filter.return_value.first.return_value = test_user
+
+    response = client.get(
+        "/api/tasks?limit=1&cursor=invalid",
+        headers={"Authorization": f"Bearer {signer.token()}"},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    UserModel.metadata.create_all(engine)
+    TaskModel.metadata.create_all(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.add(
+        UserModel(
+            id="id1",
+            given_name="given_name1",
+            family_name="family_name1",
+            username="username1",
+            email="email1",
+        )
+    )
+    db.add(
+        UserModel(
+            id="id2",
+            given_name="given_name2",
+            family_name="family_name2",
+            username="username2",
+            email="email2",
+        )
+    )
+    db.commit()
+    app.dependency_overrides[get_db] = lambda: db
+    yield db
+    app.dependency_overrides = {}
+    db.close()
+    engine.dispose()
+
+
+def seed_tasks(db, count):
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db.execute(
+        insert(TaskModel),
+        [
+            {
+                "id": f"task{i:06d}",
+                "user_id": "id1",
+                "title": f"Task {i}",
+                "description": "description",
+                "priority": 1,
+                "status": "Todo",
+                "created_at": created_at + timedelta(seconds=i),
+                "deadline": created_at + timedelta(days=1),
+            }
+            for i in range(count)
+        ],
+    )
+    db.commit()
+
+
+def test_export_tasks_ndjson(sqlite_db):
+    seed_tasks(sqlite_db, 3)
+
+    response = client.get("/api/tasks/export", headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["task000000", "task000001", "task000002"]
+
+
+def test_export_tasks_json(sqlite_db):
+    seed_tasks(sqlite_db, 3)
+
+    response = client.get(
+        "/api/tasks/export?format=json", headers={"Authorization": f"Bearer {signer.token()}"}
+    )
+
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == ["task000000", "task000001", "task000002"]
+
+
+def test_export_tasks_json_empty(sqlite_db):
+    chunks = stream_tasks_export("id1", sqlite_db.get_bind(), "json", batch_size=2)
+
+    assert b"".join(chunks) == b"[]"
+
+
+def test_export_tasks_json_batches(sqlite_db):
+    seed_tasks(sqlite_db, 4)
+
+    chunks = list(stream_tasks_export("id1", sqlite_db.get_bind(), "json", batch_size=2))
+
+    assert len(json.loads(b"".join(chunks))) == 4
+
+
+def export_peak_memory(db, count):
+    seed_tasks(db, count)
+    tracemalloc.start()
+    for _ in stream_tasks_export("id1", db.get_bind(), "ndjson", batch_size=500):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.execute(delete(TaskModel))
+    db.commit()
+    return peak
+
+
+def test_export_tasks_memory_is_constant(sqlite_db):
+    small_peak = export_peak_memory(sqlite_db, 1000)
+    large_peak = export_peak_memory(sqlite_db, 10000)
+
+    # Ten times more tasks must not need noticeably more memory
+    assert large_peak < small_peak * 1.5
+
+
+def test_create_tasks_bulk(sqlite_db):
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    past_deadline = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    tasks_data = [
+        {"title": "Task 1", "description": "description", "priority": 1, "deadline": deadline},
+        {"title": "Task 2", "description": "description", "priority": 2, "deadline": past_deadline},
+        {"title": "Task 3", "description": "description", "priority": 3, "deadline": deadline},
+        {"title": "Task 4", "description": "description", "priority": 4},
+    ]
+
+    response = client.post(
+        "/api/tasks/bulk", json=tasks_data, headers={"Authorization": f"Bearer {signer.token()}"}
+    )
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status"] for result in results] == ["created", "error", "created", "error"]
+    assert results[3]["detail"] == "Deadline is required."
+    titles = sqlite_db.scalars(select(TaskModel.title).order_by(TaskModel.title)).all()
+    assert titles == ["Task 1", "Task 3"]
+
+
+def test_create_tasks_bulk_too_many(sqlite_db):
+    task_data = {"title": "Task", "description": "description", "priority": 1}
+
+    response = client.post(
+        "/api/tasks/bulk",
+        json=[task_data] * (MAX_BULK_SIZE + 1),
+        headers={"Authorization": f"Bearer {signer.token()}"},
+    )
+
+    assert response.status_code == 422
+
+
+def test_update_tasks_bulk(sqlite_db):
+    seed_tasks(sqlite_db, 3)
+    sqlite_db.add(
+        TaskModel(
+            id="other_task",
+            user_id="id2",
+            title="Other",
+            description="description",
+            priority=1,
+            deadline=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        )
+    )
+    sqlite_db.commit()
+    tasks_data = [
+        {"id": "task000000", "status": "Done"},
+        {"id": "task000001", "title": "Renamed", "priority": 5},
+        {"id": "other_task", "status": "Done"},
+        {"id": "missing_task", "status": "Done"},
+    ]
+
+    response = client.patch(
+        "/api/tasks/bulk", json=tasks_data, headers={"Authorization": f"Bearer {signer.token()}"}
+    )
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()] == ["updated", "updated", "not_found", "not_found"]
+    sqlite_db.expire_all()
+    tasks = {task.id: task for task in sqlite_db.scalars(select(TaskModel))}
+    assert tasks["task000000"].status == "Done"
+    assert tasks["task000000"].title == "Task 0"
+    assert (tasks["task000001"].title, tasks["task000001"].priority) == ("Renamed", 5)
+    assert tasks["other_task"].status == "Todo"
+
+
+def test_delete_tasks_bulk(sqlite_db):
+    seed_tasks(sqlite_db, 3)
+
+    response = client.request(
+        "DELETE",
+        "/api/tasks/bulk",
+        json={"ids": ["task000000", "task000002", "missing_task"]},
+        headers={"Authorization": f"Bearer {signer.token()}"},
+    )
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()] == ["deleted", "deleted", "not_found"]
+    assert sqlite_db.scalars(select(TaskModel.id)).all() == ["task000001"]
+
+
+def test_update_task(sqlite_db):
+    seed_tasks(sqlite_db, 1)
+
+    response = client.put(
+        "/api/tasks/task000000",
+        json={"status": "Done"},
+        headers={"Authorization": f"Bearer {signer.token()}"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "Done"
+    assert response.json()["title"] == "Task 0"
+
+
+def test_update_task_without_returning(sqlite_db):
+    seed_tasks(sqlite_db, 1)
+
+    with patch.object(sqlite_db.get_bind().dialect, "update_returning", False):
+        response = client.put(
+            "/api/tasks/task000000",
+            json={"title": "Renamed"},
+            headers={"Authorization": f"Bearer {signer.token()}"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+
+
+def test_update_task_of_other_user(sqlite_db):
+    seed_tasks(sqlite_db, 1)
+
+    response = client.put(
+        "/api/tasks/task000000",
+        json={"status": "Done"},
+        headers={"Authorization": f"Bearer {signer.token(sub='id2', username='username2')}"},
+    )
+
+    assert response.status_code == 404
+
+
+def test_delete_task(sqlite_db):
+    seed_tasks(sqlite_db, 2)
+
+    response = client.delete("/api/tasks/task000000", headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert response.status_code == 200
+    assert response.json() == {"id": "task000000"}
+    assert sqlite_db.scalars(select(TaskModel.id)).all() == ["task000001"]
+
+
+def test_delete_task_not_found(sqlite_db):
+    response = client.delete("/api/tasks/missing_task", headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Task not found."}
+
+
+@pytest.fixture
+def pooled_db(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool
+    )
+    UserModel.metadata.create_all(engine)
+    TaskModel.metadata.create_all(engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with session_factory() as db:
+        db.add(
+            UserModel(
+                id="id1",
+                given_name="given_name1",
+                family_name="family_name1",
+                username="username1",
+                email="email1",
+            )
+        )
+        db.commit()
+    engine.pool.metrics.checkouts = 0
+    with patch("db.database.SessionLocal", wraps=session_factory) as sessions:
+        yield engine, sessions
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "method, path, headers, checkouts",
+    [
+        ("GET", "/health", {}, 0),
+        ("GET", "/openapi.json", {}, 0),
+        (
+            "OPTIONS",
+            "/api/tasks",
+            {"Origin": "http://localhost", "Access-Control-Request-Method": "GET"},
+            0,
+        ),
+        ("GET", "/api/tasks", {}, 0),
+        ("GET", "/api/tasks", {"Authorization": "Bearer invalid"}, 0),
+        ("GET", "/api/tasks", {"Authorization": f"Bearer {signer.token()}"}, 1),
+    ],
+)
+def test_pool_checkouts_per_request(pooled_db, method, path, headers, checkouts):
+    engine, sessions = pooled_db
+    response = client.request(method, path, headers=headers)
+
+    assert response.status_code < 500
+    assert sessions.call_count == checkouts
+    assert engine.pool.metrics.checkouts == checkouts
+    assert engine.pool.checkedout() == 0
+
+
+# The user lookup is counted, the user cache is cleared before every test
+@pytest.mark.parametrize(
+    "method, path, body, max_queries",
+    [
+        ("POST", "/api/tasks", {"title": "Task", "description": "description", "priority": 1, "deadline": "2099-01-01T00:00:00Z"}, 4),
+        ("GET", "/api/tasks", None, 3),
+        ("GET", "/api/tasks?limit=1", None, 3),
+        ("GET", "/api/tasks/task000001", None, 2),
+        ("PUT", "/api/tasks/task000001", {"title": "Title"}, 3),
+        ("DELETE", "/api/tasks/task000001", None, 3),
+    ],
+)
+def test_queries_per_request(sqlite_db, method, path, body, max_queries):
+    seed_tasks(sqlite_db, 2)
+
+    response = client.request(method, path, json=body, headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert response.status_code < 300
+    assert float(response.headers["X-DB-Query-Time"]) > 0
+    assert_max_queries(response, max_queries)
+
+
+def test_db_session_released_on_error(pooled_db):
+    engine, sessions = pooled_db
+    with patch("routers.task.get_tasks_page", side_effect=RuntimeError("boom")):
+        with pytest.raises(RuntimeError):
+            client.get("/api/tasks", headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert engine.pool.metrics.checkouts == 1
+    assert engine.pool.checkedout() == 0
+
+
+@pytest.fixture
+def async_db(sqlite_db):
+    engine = create_async_engine(
+        sqlite_db.get_bind().url.set(drivername="sqlite+aiosqlite"), poolclass=NullPool
+    )
+
+    async def override_get_session():
+        async with AsyncSession(bind=engine, expire_on_commit=False) as db:
+            yield db
+
+    app.dependency_overrides[get_session] = override_get_session
+    yield sqlite_db
+    asyncio.run(engine.dispose())
+
+
+def test_async_mode_create_and_list_tasks(async_db):
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+    deadline = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+
+    response = client.post("/api/tasks", json={"title": "Task", "description": "description", "priority": 1, "deadline": deadline}, headers=headers)
+    assert response.status_code == 201
+
+    response = client.get("/api/tasks", headers=headers)
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == ["Task"]
+
+
+def test_async_mode_pagination(async_db):
+    seed_tasks(async_db, 3)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+
+    first = client.get("/api/tasks?limit=2", headers=headers)
+    second = client.get(f"/api/tasks?limit=2&cursor={first.headers['X-Next-Cursor']}", headers=headers)
+
+    assert [task["id"] for task in first.json()] == ["task000000", "task000001"]
+    assert [task["id"] for task in second.json()] == ["task000002"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_async_mode_export_tasks(async_db):
+    seed_tasks(async_db, 3)
+
+    response = client.get("/api/tasks/export?format=json", headers={"Authorization": f"Bearer {signer.token()}"})
+
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == ["task000000", "task000001", "task000002"]
+
+
+def test_async_mode_update_and_delete_task(async_db):
+    seed_tasks(async_db, 2)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+
+    response = client.put("/api/tasks/task000000", json={"status": "Done"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "Done"
+
+    response = client.delete("/api/tasks/task000001", headers=headers)
+    assert response.status_code == 200
+    assert async_db.scalars(select(TaskModel.id)).all() == ["task000000"]
+
+
+def test_async_mode_user_not_found(async_db):
+    response = client.get("/api/tasks", headers={"Authorization": f"Bearer {signer.token(sub='unknown', username='unknown')}"})
+
+    assert response.status_code == 404
+
+
+def test_get_all_tasks_served_from_cache(sqlite_db):
+    seed_tasks(sqlite_db, 3)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+
+    first = client.get("/api/tasks?limit=2", headers=headers)
+    with patch("routers.task.get_tasks_page") as mock_get_tasks_page:
+        second = client.get("/api/tasks?limit=2", headers=headers)
+
+    mock_get_tasks_page.assert_not_called()
+    assert second.content == first.content
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert task_list_cache.stats()["hits"] == 1
+
+
+def test_get_all_tasks_cache_per_query_and_user(sqlite_db):
+    seed_tasks(sqlite_db, 3)
+
+    all_tasks = client.get("/api/tasks", headers={"Authorization": f"Bearer {signer.token()}"})
+    page = client.get("/api/tasks?limit=1", headers={"Authorization": f"Bearer {signer.token()}"})
+    other_user = client.get("/api/tasks", headers={"Authorization": f"Bearer {signer.token(sub='id2', username='username2')}"})
+
+    assert len(all_tasks.json()) == 3
+    assert len(page.json()) == 1
+    assert other_user.json() == []
+
+
+future_deadline = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+
+
+@pytest.mark.parametrize(
+    "method, path, body",
+    [
+        ("POST", "/api/tasks", {"title": "New", "description": "description", "priority": 1, "deadline": future_deadline}),
+        ("PUT", "/api/tasks/task000000", {"title": "Updated"}),
+        ("DELETE", "/api/tasks/task000000", None),
+        ("POST", "/api/tasks/bulk", [{"title": "New", "description": "description", "priority": 1, "deadline": future_deadline}]),
+        ("PATCH", "/api/tasks/bulk", [{"id": "task000000", "title": "Updated"}]),
+        ("DELETE", "/api/tasks/bulk", {"ids": ["task000000"]}),
+    ],
+)
+def test_get_all_tasks_cache_invalidated_by_writes(sqlite_db, method, path, body):
+    seed_tasks(sqlite_db, 2)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+    before = client.get("/api/tasks", headers=headers).json()
+
+    assert client.request(method, path, json=body, headers=headers).status_code < 300
+    after = client.get("/api/tasks", headers=headers).json()
+
+    assert after != before
+    assert task_list_cache.stats()["hits"] == 0
+
+
+def test_get_all_tasks_etag(sqlite_db):
+    seed_tasks(sqlite_db, 2)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+
+    first = client.get("/api/tasks", headers=headers)
+    etag = first.headers["ETag"]
+    # From the response cache and from the tasks version
+    cached = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+    task_list_cache.clear()
+    uncached = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+
+    assert cached.status_code == 304
+    assert uncached.status_code == 304
+    assert cached.content == uncached.content == b""
+    assert uncached.headers["ETag"] == etag
+    assert client.get("/api/tasks?limit=1", headers=headers).headers["ETag"] != etag
+
+
+def test_get_all_tasks_etag_changes_after_write(sqlite_db):
+    seed_tasks(sqlite_db, 2)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+    etag = client.get("/api/tasks", headers=headers).headers["ETag"]
+
+    client.delete("/api/tasks/task000000", headers=headers)
+    response = client.get("/api/tasks", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [task["id"] for task in response.json()] == ["task000001"]
+
+
+def test_get_task(sqlite_db):
+    seed_tasks(sqlite_db, 1)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+
+    response = client.get("/api/tasks/task000000", headers=headers)
+    not_modified = client.get("/api/tasks/task000000", headers={**headers, "If-None-Match": response.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert response.json()["id"] == "task000000"
+    assert response.headers["ETag"] == '"task000000-1"'
+    assert not_modified.status_code == 304
+
+
+def test_get_task_of_other_user(sqlite_db):
+    seed_tasks(sqlite_db, 1)
+
+    response = client.get("/api/tasks/task000000", headers={"Authorization": f"Bearer {signer.token(sub='id2', username='username2')}"})
+
+    assert response.status_code == 404
+
+
+def test_update_task_if_match(sqlite_db):
+    seed_tasks(sqlite_db, 1)
+    headers = {"Authorization": f"Bearer {signer.token()}"}
+    etag = client.get("/api/tasks/task000000", headers=headers).headers["ETag"]
+
+    updated = client.put("/api/tasks/task000000", json={"title": "First"}, headers={**headers, "If-Match": etag})
+    conflict = client.put("/api/tasks/task000000", json={"title": "Second"}, headers={**headers, "If-Match": etag})
+
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] == '"task000000-2"'
+    assert conflict.status_code == 412
+    assert client.get("/api/tasks/task000000", headers=headers).json()["title"] == "First"
+
+
+@pytest.mark.parametrize("if_match", ['W/"task000000-1"', '"other-1"', '"task000000-x"'])
+def test_update_task_if_match_invalid(sqlite_db, if_match):
+    seed_tasks(sqlite_db, 1)
+    headers = {"Authorization": f"Bearer {signer.token()}", "If-Match": if_match}
+
+    response = client.put("/api/tasks/task000000", json={"title": "Updated"}, headers=headers)
+
+    assert response.status_code == 412
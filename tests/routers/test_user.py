@@ -1,5 +1,6 @@
 import os
 import pytest
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
@@ -7,6 +8,7 @@ from sqlalchemy.orm import Session
 from auth.JWTBearer import JWTAuthorizationCredentials
 from db.database import get_db
 from main import app
+from models.user import User
 from schemas.user import UserCreate
 from routers.user import auth
 
@@ -157,4 +159,38 @@ def test_unsuccessful_logout(mock_logout_with_token):
 
     mock_logout_with_token.assert_called_once_with("token")
 
-    app.dependency_overrides = {}
\ No newline at end of file
+    app.dependency_overrides = {}
+
+def test_current_user():
+    db = MagicMock(spec=Session)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[auth] = lambda: JWTAuthorizationCredentials(
+        jwt_token="token",
+        header={"kid": "some_kid"},
+        claims={"sub": "id1", "username": "username1"},
+        signature="signature",
+        message="message",
+    )
+    db.query.return_value.filter.return_value.first.return_value = User(
+        id="id1",
+        given_name="given_name1",
+        family_name="family_name1",
+        username="username1",
+        email="email@email.com",
+        updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        tasks_version=3,
+    )
+
+    response = client.get("/api/auth/me", headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": "id1",
+        "given_name": "given_name1",
+        "family_name": "family_name1",
+        "username": "username1",
+        "email": "email@email.com",
+        "updated_at": "2024-01-01T00:00:00Z",
+    }
+
+    app.dependency_overrides = {}
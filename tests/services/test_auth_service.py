@@ -1,10 +1,14 @@
+import asyncio
 import base64
 import os
+import time
 import pytest
 import logging
 from unittest.mock import patch
+from fastapi import HTTPException
 
-from auth.user_auth import auth_with_code, user_info_with_token, logout_with_token
+from auth import async_user_auth, user_auth
+from auth.user_auth import COGNITO_TIMEOUT, auth_with_code, user_info_with_token, logout_with_token
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -48,7 +52,7 @@ def test_unsuccessful_auth_with_code(requests_post_mock):
     result = auth_with_code("code", "redirect_uri")
 
     requests_post_mock.assert_called_once_with(
-        cognito_token_endpoint, data=payload, headers=headers
+        cognito_token_endpoint, data=payload, headers=headers, timeout=COGNITO_TIMEOUT
     )
     assert result is None
 
@@ -70,16 +74,16 @@ def test_successful_auth_with_code(requests_post_mock):
     result = auth_with_code("code", "redirect_uri")
 
     requests_post_mock.assert_called_once_with(
-        cognito_token_endpoint, data=payload, headers=headers
+        cognito_token_endpoint, data=payload, headers=headers, timeout=COGNITO_TIMEOUT
     )
     assert result == {"token": "client_access_token", "expires_in": 200}
 
 
-@patch(
-    "auth.user_auth.cognito_client.get_user",
-    return_value={"ResponseMetadata": {"HTTPStatusCode": 200}},
-)
-def test_user_info_with_token(mock_cognito_client_get_user_function):
+@patch("auth.user_auth.get_cognito_client")
+def test_user_info_with_token(mock_get_cognito_client):
+    mock_cognito_client_get_user_function = mock_get_cognito_client.return_value.get_user
+    mock_cognito_client_get_user_function.return_value = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
     result = user_info_with_token("access_token")
 
     mock_cognito_client_get_user_function.assert_called_once_with(
@@ -89,11 +93,11 @@ def test_user_info_with_token(mock_cognito_client_get_user_function):
 
 
 # 400 it's just a random error status code to test the error handling
-@patch(
-    "auth.user_auth.cognito_client.get_user",
-    return_value={"ResponseMetadata": {"HTTPStatusCode": 400}},
-)
-def test_unsuccessful_user_info_with_token(mock_cognito_client_get_user_function):
+@patch("auth.user_auth.get_cognito_client")
+def test_unsuccessful_user_info_with_token(mock_get_cognito_client):
+    mock_cognito_client_get_user_function = mock_get_cognito_client.return_value.get_user
+    mock_cognito_client_get_user_function.return_value = {"ResponseMetadata": {"HTTPStatusCode": 400}}
+
     result = user_info_with_token("access_token_2")
 
     mock_cognito_client_get_user_function.assert_called_once_with(
@@ -102,11 +106,11 @@ def test_unsuccessful_user_info_with_token(mock_cognito_client_get_user_function
     assert result is None
 
 
-@patch(
-    "auth.user_auth.cognito_client.global_sign_out",
-    return_value={"ResponseMetadata": {"HTTPStatusCode": 200}},
-)
-def test_logout_with_token(mock_cognito_client_global_sign_out_function):
+@patch("auth.user_auth.get_cognito_client")
+def test_logout_with_token(mock_get_cognito_client):
+    mock_cognito_client_global_sign_out_function = mock_get_cognito_client.return_value.global_sign_out
+    mock_cognito_client_global_sign_out_function.return_value = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
     result = logout_with_token("access_token")
 
     mock_cognito_client_global_sign_out_function.assert_called_once_with(
@@ -116,14 +120,49 @@ def test_logout_with_token(mock_cognito_client_global_sign_out_function):
 
 
 # 400 it's just a random error status code to test the error handling
-@patch(
-    "auth.user_auth.cognito_client.global_sign_out",
-    return_value={"ResponseMetadata": {"HTTPStatusCode": 400}},
-)
-def test_unsuccessful_logout_with_token(mock_cognito_client_global_sign_out_function):
+@patch("auth.user_auth.get_cognito_client")
+def test_unsuccessful_logout_with_token(mock_get_cognito_client):
+    mock_cognito_client_global_sign_out_function = mock_get_cognito_client.return_value.global_sign_out
+    mock_cognito_client_global_sign_out_function.return_value = {"ResponseMetadata": {"HTTPStatusCode": 400}}
+
     result = logout_with_token("access_token_2")
 
     mock_cognito_client_global_sign_out_function.assert_called_once_with(
         AccessToken="access_token_2"
     )
-    assert result == False
\ No newline at end of file
+    assert result == False
+
+@patch("auth.user_auth.get_cognito_client")
+def test_async_user_info_with_token(mock_get_cognito_client):
+    mock_cognito_client_get_user_function = mock_get_cognito_client.return_value.get_user
+    mock_cognito_client_get_user_function.return_value = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    result = asyncio.run(async_user_auth.user_info_with_token("access_token"))
+
+    mock_cognito_client_get_user_function.assert_called_once_with(
+        AccessToken="access_token"
+    )
+    assert result == {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+@patch("auth.user_auth.get_cognito_client")
+def test_async_logout_with_token_timeout(mock_get_cognito_client):
+    mock_cognito_client_global_sign_out_function = mock_get_cognito_client.return_value.global_sign_out
+    mock_cognito_client_global_sign_out_function.side_effect = lambda AccessToken: time.sleep(0.5)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(
+            async_user_auth.run_in_executor(
+                logout_with_token, "access_token", timeout=0.05
+            )
+        )
+
+    assert exc_info.value.status_code == 504
+
+
+@patch("auth.user_auth._cognito_client", None)
+@patch("boto3.client")
+def test_cognito_client_created_once_on_first_use(mock_boto3_client):
+    assert user_auth._cognito_client is None
+    assert user_auth.get_cognito_client() is user_auth.get_cognito_client()
+    mock_boto3_client.assert_called_once()
@@ -0,0 +1,54 @@
+import json
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+
+from schemas.encoding import FastJSONResponse, dumps, rows_to_dicts
+from schemas.task import TaskInDB
+
+fields = tuple(TaskInDB.model_fields)
+
+
+def task(created_at, deadline):
+    return TaskInDB(
+        id="task1",
+        title="Título",
+        description="description",
+        priority=1,
+        status="Todo",
+        created_at=created_at,
+        deadline=deadline,
+    )
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize(
+    "created_at, deadline",
+    [
+        (datetime(2024, 1, 1, 12, 30), datetime(2024, 1, 2, tzinfo=timezone.utc)),
+        (datetime(2024, 1, 1, 12, 30, 0, 123456), datetime(2024, 1, 2, tzinfo=timezone(timedelta(hours=2)))),
+        (datetime(2024, 1, 1), None),
+    ],
+)
+def test_dumps_matches_pydantic(use_orjson, created_at, deadline):
+    model = task(created_at, deadline)
+
+    with patch("schemas.encoding.orjson", None) if not use_orjson else nullcontext():
+        encoded = dumps(rows_to_dicts([model], fields))
+
+    assert json.loads(encoded) == [json.loads(model.model_dump_json())]
+    assert encoded == b"[" + model.model_dump_json().encode() + b"]"
+
+
+def test_rows_to_dicts_keeps_field_order():
+    rows = rows_to_dicts([task(datetime(2024, 1, 1), None)], fields)
+
+    assert list(rows[0]) == list(fields)
+
+
+def test_fast_json_response():
+    response = FastJSONResponse({"created_at": datetime(2024, 1, 1, tzinfo=timezone.utc)})
+
+    assert response.body == b'{"created_at":"2024-01-01T00:00:00Z"}'
@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from auth.jwks import JWKS, JWKSProvider
+
+jwks_url = "http://jwks_endpoint/.well-known/jwks.json"
+key1 = {"kid": "kid1", "kty": "RSA", "alg": "RS256", "n": "n1", "e": "AQAB"}
+key2 = {"kid": "kid2", "kty": "RSA", "alg": "RS256", "n": "n2", "e": "AQAB"}
+
+
+class RequestsMockResponse:
+    def __init__(self, json_data, status_code, headers=None):
+        self.json_data = json_data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        if isinstance(self.json_data, Exception):
+            raise self.json_data
+        return self.json_data
+
+
+@pytest.fixture
+def provider():
+    return JWKSProvider(jwks_url, refresh_interval=3600, min_refetch_interval=30)
+
+
+@patch("auth.jwks.requests.get")
+def test_keys_are_loaded_lazily(requests_get_mock, provider):
+    assert requests_get_mock.call_count == 0
+    assert provider.needs_fetch("kid1")
+
+    requests_get_mock.return_value = RequestsMockResponse({"keys": [key1]}, 200)
+    provider.ensure_key("kid1")
+
+    requests_get_mock.assert_called_once_with(jwks_url, headers={}, timeout=5)
+    assert not provider.needs_fetch("kid1")
+
+
+@patch("auth.jwks.requests.get")
+def test_unknown_kid_refetch_is_rate_limited(requests_get_mock, provider):
+    requests_get_mock.return_value = RequestsMockResponse({"keys": [key1]}, 200)
+    provider.ensure_key("kid1")
+
+    provider.ensure_key("unknown_kid")
+    provider.ensure_key("unknown_kid")
+
+    assert requests_get_mock.call_count == 1
+
+
+@patch("auth.jwks.requests.get")
+def test_unknown_kid_triggers_refetch_after_interval(requests_get_mock, provider):
+    requests_get_mock.return_value = RequestsMockResponse({"keys": [key1]}, 200)
+    provider.ensure_key("kid1")
+    provider.last_fetch -= provider.min_refetch_interval
+
+    requests_get_mock.return_value = RequestsMockResponse({"keys": [key2]}, 200)
+    provider.ensure_key("kid2")
+
+    assert requests_get_mock.call_count == 2
+    assert set(provider.kid_to_jwk) == {"kid2"}
+
+
+@patch("auth.jwks.requests.get")
+def test_concurrent_refetches_share_one_request(requests_get_mock, provider):
+    def slow_response(*args, **kwargs):
+        time.sleep(0.1)
+        return RequestsMockResponse({"keys": [key1]}, 200)
+
+    requests_get_mock.side_effect = slow_response
+    threads = [threading.Thread(target=provider.ensure_key, args=("kid1",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert requests_get_mock.call_count == 1
+    assert "kid1" in provider.kid_to_jwk
+
+
+@patch("auth.jwks.requests.get")
+def test_refresh_uses_etag_and_cache_control(requests_get_mock, provider):
+    requests_get_mock.return_value = RequestsMockResponse(
+        {"keys": [key1]}, 200, {"ETag": '"v1"', "Cache-Control": "max-age=600"}
+    )
+    provider.refresh(force=True)
+
+    assert provider.etag == '"v1"'
+    assert provider.expires_at == pytest.approx(time.time() + 600, abs=5)
+
+    requests_get_mock.return_value = RequestsMockResponse(None, 304)
+    assert provider.refresh(force=True)
+
+    requests_get_mock.assert_called_with(
+        jwks_url, headers={"If-None-Match": '"v1"'}, timeout=5
+    )
+    assert "kid1" in provider.kid_to_jwk
+
+
+@patch("auth.jwks.requests.get")
+def test_missing_keys_field(requests_get_mock, provider):
+    requests_get_mock.return_value = RequestsMockResponse({}, 200)
+
+    assert not provider.refresh(force=True)
+    with pytest.raises(KeyError):
+        provider.get_key("kid1")
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        json.JSONDecodeError("Expecting value", "<html></html>", 0),
+        ["kid1"],
+        {"keys": "kid1"},
+        {"keys": [key1, {"kty": "RSA", "alg": "RS256", "n": "n2", "e": "AQAB"}]},
+    ],
+)
+@patch("auth.jwks.requests.get")
+def test_invalid_jwks_response(requests_get_mock, provider, body):
+    requests_get_mock.return_value = RequestsMockResponse(body, 200)
+
+    assert not provider.refresh(force=True)
+    assert provider.kid_to_jwk == {}
+
+
+@patch("auth.jwks.requests.get")
+def test_get_key_never_fetches(requests_get_mock, provider):
+    with pytest.raises(KeyError):
+        provider.get_key("kid1")
+
+    assert requests_get_mock.call_count == 0
+
+
+@patch("auth.jwks.requests.get")
+def test_refresh_loop_survives_errors(requests_get_mock):
+    provider = JWKSProvider(jwks_url, refresh_interval=0.01, min_refetch_interval=0.01)
+    requests_get_mock.side_effect = [RuntimeError("boom"), RuntimeError("boom")] + [
+        RequestsMockResponse({"keys": [key1]}, 200)
+    ] * 100
+
+    provider.start()
+    deadline = time.monotonic() + 5
+    while "kid1" not in provider.kid_to_jwk and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert provider._thread.is_alive()
+    provider.stop()
+    assert "kid1" in provider.kid_to_jwk
+
+
+@patch("auth.jwks.requests.get")
+def test_cache_file_skips_network_on_cold_start(requests_get_mock, tmp_path):
+    cache_file = str(tmp_path / "jwks.json")
+    requests_get_mock.return_value = RequestsMockResponse(
+        {"keys": [key1]}, 200, {"ETag": '"v1"'}
+    )
+    JWKSProvider(jwks_url, cache_file=cache_file).ensure_key("kid1")
+
+    cold_provider = JWKSProvider(jwks_url, cache_file=cache_file)
+    cold_provider.ensure_key("kid1")
+
+    assert requests_get_mock.call_count == 1
+    assert cold_provider.etag == '"v1"'
+    assert "kid1" in cold_provider.kid_to_jwk
+
+
+@patch("auth.jwks.requests.get")
+def test_cache_file_with_key_missing_kid_is_ignored(requests_get_mock, tmp_path):
+    cache_file = tmp_path / "jwks.json"
+    cache_file.write_text(json.dumps({"keys": [{"kty": "RSA", "alg": "RS256", "n": "n1", "e": "AQAB"}]}))
+    requests_get_mock.return_value = RequestsMockResponse({"keys": [key1]}, 200)
+
+    provider = JWKSProvider(jwks_url, cache_file=str(cache_file))
+    provider.ensure_key("kid1")
+
+    assert requests_get_mock.call_count == 1
+    assert "kid1" in provider.kid_to_jwk
+
+
+def test_static_jwks_never_fetches():
+    provider = JWKSProvider(jwks=JWKS(keys=[key1]))
+
+    assert not provider.needs_fetch("kid1")
+    assert not provider.needs_fetch("unknown_kid")
@@ -0,0 +1,115 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from jose import jwk
+from starlette.requests import Request
+
+from auth.JWTBearer import JWKS, JWTBearer
+from benchmarks.tokens import LocalSigner
+from cache.ttl_cache import TTLCache
+
+signer = LocalSigner(kid="test_kid")
+jwks = JWKS.model_validate(signer.jwks())
+
+
+def create_request(token):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/tasks",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+    )
+
+
+@pytest.fixture
+def bearer():
+    return JWTBearer(jwks, token_cache=TTLCache(max_size=2, ttl=60))
+
+
+@patch("auth.JWTBearer.user_info_with_token")
+def test_verified_token_is_cached(mock_user_info_with_token, bearer):
+    token = signer.token()
+
+    first = asyncio.run(bearer(create_request(token)))
+    second = asyncio.run(bearer(create_request(token)))
+
+    assert first.claims["username"] == "username1"
+    assert second is first
+    mock_user_info_with_token.assert_called_once_with(token)
+    assert bearer.token_cache.hits == 1
+    assert bearer.token_cache.misses == 1
+
+
+@patch("auth.JWTBearer.user_info_with_token")
+def test_cached_token_expires_with_token(mock_user_info_with_token, bearer):
+    token = signer.token(expires_in=-1)
+
+    asyncio.run(bearer(create_request(token)))
+
+    assert len(bearer.token_cache) == 0
+
+
+@patch("auth.JWTBearer.user_info_with_token")
+def test_invalid_token_is_not_cached(mock_user_info_with_token, bearer):
+    token = signer.token()
+    header, payload, _ = token.split(".")
+    forged_token = f"{header}.{payload}.{signer.token(username='other').split('.')[2]}"
+
+    with pytest.raises(HTTPException):
+        asyncio.run(bearer(create_request(forged_token)))
+
+    assert len(bearer.token_cache) == 0
+
+
+@patch("auth.JWTBearer.user_info_with_token")
+def test_invalidate_token(mock_user_info_with_token, bearer):
+    token = signer.token()
+
+    asyncio.run(bearer(create_request(token)))
+    bearer.invalidate_token(token)
+    asyncio.run(bearer(create_request(token)))
+
+    assert mock_user_info_with_token.call_count == 2
+
+
+def test_token_cache_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_token_cache_ttl():
+    cache = TTLCache(max_size=2, ttl=60)
+
+    cache.set("a", 1, ttl=0)
+    cache.set("b", 2, expires_at=time.time() - 1)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert len(cache) == 0
+
+
+def test_public_key_is_constructed_once(bearer):
+    with patch("auth.jwks.jwk.construct", wraps=jwk.construct) as mock_construct:
+        first = bearer.get_public_key("test_kid")
+        second = bearer.get_public_key("test_kid")
+
+    assert first is second
+    mock_construct.assert_called_once()
+
+
+def test_public_key_unknown_kid(bearer):
+    with pytest.raises(KeyError):
+        bearer.get_public_key("unknown_kid")
@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from main import app
+from metrics.collectors import cache_metrics, pool_metrics
+from metrics.prometheus import Counter, Histogram, Registry, phase_duration, phase_timer, request_duration
+
+client = TestClient(app)
+
+
+def sample(metric, name, **labels):
+    for sample_name, sample_labels, value in metric.samples():
+        if sample_name == name and sample_labels == labels:
+            return value
+    return None
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "/tasks")
+
+    assert sample(histogram, "latency_seconds_bucket", route="/tasks", le="0.1") == 1
+    assert sample(histogram, "latency_seconds_bucket", route="/tasks", le="1") == 3
+    assert sample(histogram, "latency_seconds_bucket", route="/tasks", le="+Inf") == 4
+    assert sample(histogram, "latency_seconds_count", route="/tasks") == 4
+    assert sample(histogram, "latency_seconds_sum", route="/tasks") == 6.05
+
+
+def test_registry_render():
+    registry = Registry()
+    counter = registry.register(Counter("requests_total", "Requests.", ("path",)))
+    counter.inc('/a"b')
+    registry.add_collector(lambda: cache_metrics({"user": {"size": 2, "hits": 3, "misses": 1}}))
+
+    text = registry.render()
+
+    assert "# TYPE requests_total counter\n" in text
+    assert 'requests_total{path="/a\\"b"} 1\n' in text
+    assert 'cache_size{cache="user"} 2\n' in text
+    assert 'cache_hits{cache="user"} 3\n' in text
+
+
+def test_pool_metrics():
+    snapshot = {
+        "size": 10,
+        "in_use": 2,
+        "overflow": 0,
+        "checkouts": 5,
+        "checkout_timeouts": 1,
+        "checkout_time_total": 0.25,
+        "checkout_time_max": 0.125,
+    }
+
+    values = {metric.name: next(iter(metric.samples()))[2] for metric in pool_metrics(snapshot)}
+
+    assert values["db_pool_in_use"] == 2
+    assert values["db_pool_checkout_timeouts"] == 1
+    assert values["db_pool_checkout_time_max"] == 0.125
+
+
+def test_phase_timer_decorates_sync_and_async_functions():
+    @phase_timer("test_sync")
+    def sync_phase():
+        return 1
+
+    @phase_timer("test_async")
+    async def async_phase():
+        return 2
+
+    assert sync_phase() == 1
+    assert asyncio.run(async_phase()) == 2
+    assert sample(phase_duration, "app_phase_duration_seconds_count", phase="test_sync") == 1
+    assert sample(phase_duration, "app_phase_duration_seconds_count", phase="test_async") == 1
+
+
+def test_requests_are_recorded_by_route_template():
+    labels = {"method": "GET", "route": "/health", "status": "200"}
+    before = sample(request_duration, "http_request_duration_seconds_count", **labels) or 0
+
+    client.get("/health")
+    client.get("/api/tasks/unknown")
+
+    assert sample(request_duration, "http_request_duration_seconds_count", **labels) == before + 1
+    assert sample(request_duration, "http_request_duration_seconds_count", method="GET", route="/api/tasks/{task_id}", status="403")
+
+
+def test_metrics_endpoint():
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
+    assert 'http_requests_in_flight{method="GET"} 1' in response.text
+    assert 'cache_hits{cache="task_list"}' in response.text
@@ -0,0 +1,62 @@
+import os
+import pstats
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from main import app as main_app
+from metrics.profiling import ProfilingMiddleware, sign_profile_request
+
+SECRET = "secret"
+
+
+def profiled_client(tmp_path, **options):
+    app = FastAPI()
+
+    @app.get("/api/tasks")
+    async def get_tasks():
+        return []
+
+    app.add_middleware(ProfilingMiddleware, output_dir=str(tmp_path), **options)
+    return TestClient(app)
+
+
+def test_signed_request_is_profiled(tmp_path):
+    client = profiled_client(tmp_path, secret=SECRET)
+
+    response = client.get("/api/tasks", headers={"X-Profile": sign_profile_request(SECRET, "/api/tasks")})
+
+    assert response.status_code == 200
+    assert os.listdir(tmp_path) == [response.headers["X-Profile-File"]]
+    stats = pstats.Stats(str(tmp_path / response.headers["X-Profile-File"]))
+    assert any(name == "get_tasks" for _, _, name in stats.stats)
+
+
+def test_unsigned_request_is_not_profiled(tmp_path):
+    client = profiled_client(tmp_path, secret=SECRET)
+
+    for header in (
+        {},
+        {"X-Profile": sign_profile_request("other", "/api/tasks")},
+        {"X-Profile": sign_profile_request(SECRET, "/api/users")},
+        {"X-Profile": sign_profile_request(SECRET, "/api/tasks", int(time.time()) - 3600)},
+        {"X-Profile": "invalid"},
+    ):
+        response = client.get("/api/tasks", headers=header)
+
+        assert response.status_code == 200
+        assert "X-Profile-File" not in response.headers
+    assert os.listdir(tmp_path) == []
+
+
+def test_sampled_request_is_profiled(tmp_path):
+    client = profiled_client(tmp_path, sample_rate=1.0)
+
+    response = client.get("/api/tasks")
+
+    assert response.headers["X-Profile-File"].endswith("-GET-api_tasks.prof")
+
+
+def test_not_installed_when_disabled():
+    assert ProfilingMiddleware not in [middleware.cls for middleware in main_app.user_middleware]
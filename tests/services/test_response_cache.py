@@ -0,0 +1,47 @@
+from cache.response_cache import ResponseCache, create_backend
+from cache.ttl_cache import TTLCache
+
+
+def test_lookup_miss_then_hit():
+    cache = ResponseCache(TTLCache())
+
+    key, cached = cache.lookup("id1", "limit=10")
+    assert cached is None
+    cache.store(key, b"[]", {"X-Next-Cursor": "abc"})
+
+    assert cache.lookup("id1", "limit=10")[1] == (b"[]", {"X-Next-Cursor": "abc"})
+    assert cache.lookup("id1", "limit=20")[1] is None
+    assert cache.lookup("id2", "limit=10")[1] is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_invalidate_drops_all_queries_of_owner():
+    cache = ResponseCache(TTLCache())
+    for params in ("", "limit=10"):
+        cache.store(cache.lookup("id1", params)[0], b"[]")
+    cache.store(cache.lookup("id2", "")[0], b"[]")
+
+    cache.invalidate("id1")
+
+    assert cache.lookup("id1", "")[1] is None
+    assert cache.lookup("id1", "limit=10")[1] is None
+    assert cache.lookup("id2", "")[1] == (b"[]", {})
+
+
+def test_store_after_invalidate_is_not_served():
+    cache = ResponseCache(TTLCache())
+    key, _ = cache.lookup("id1", "")
+
+    # A write lands while the response is being built
+    cache.invalidate("id1")
+    cache.store(key, b"[\"stale\"]")
+
+    assert cache.lookup("id1", "")[1] is None
+
+
+def test_disabled_memory_backend():
+    cache = ResponseCache(create_backend("memory", max_size=0, ttl=30))
+    cache.store(cache.lookup("id1", "")[0], b"[]")
+
+    assert cache.lookup("id1", "")[1] is None